@@ -0,0 +1,290 @@
+##
+## Atlas Builder
+##
+## Build step : python atlasbuilder.py build <extracted pack root> <output directory>
+##   packs the buff bar icons (affects, horse state, love point and auto potion
+##   gauges) into atlas pages. Icon paths are read from the sources in
+##   ICON_SOURCE_FILE_LIST, icon sizes from the .sub/.dds/.tga headers found
+##   under the pack root ("d:/ymir work/" is the pack root).
+##
+##   Output:
+##     atlas_report.txt      - page, rect and size of every icon, sorted, same input gives the same file
+##     affect_atlas_<n>.tga  - atlas pages (needs PIL)
+##     <icon>.sub            - one sub image per icon pointing into its page (needs PIL)
+##     affectatlasdata.py    - icon path -> atlas sub image and uv table, goes to the root (needs PIL)
+##
+## Runtime : uiAffectShower loads affectAtlasData when it is there and
+##   draws the icons from the atlas sub images instead of their own textures.
+##
+import sys
+import os
+import re
+import struct
+
+ATLAS_PAGE_WIDTH = 256
+ATLAS_PAGE_HEIGHT = 256
+ATLAS_PADDING = 1
+
+PACK_ROOT_PREFIX = "d:/ymir work/"
+ATLAS_PATH = PACK_ROOT_PREFIX + "ui/atlas/affect/"
+ATLAS_PAGE_NAME = "affect_atlas_%d.tga"
+ATLAS_DATA_MODULE_NAME = "affectatlasdata.py"
+ATLAS_REPORT_NAME = "atlas_report.txt"
+
+ICON_SOURCE_FILE_LIST = ( "uiaffectshower.py", )
+
+# icons whose file name is made at runtime
+EXTRA_ICON_PATH_LIST = \
+	[ PACK_ROOT_PREFIX + "ui/pattern/auto_hpgauge/%.2d.dds" % grade for grade in xrange(6) ] + \
+	[ PACK_ROOT_PREFIX + "ui/pattern/auto_spgauge/%.2d.dds" % grade for grade in xrange(6) ]
+
+ICON_EXT_LIST = ( ".sub", ".dds", ".tga" )
+
+def NormalizePath(path):
+	return path.replace("\\", "/").lower()
+
+##
+## Icon list
+##
+def CollectIconPathList(sourceDirectory = "."):
+	pathSet = set([NormalizePath(path) for path in EXTRA_ICON_PATH_LIST])
+
+	literalPattern = re.compile(r'"(d:/ymir work/[^"]+)"', re.IGNORECASE)
+	joinPattern = re.compile(r'(\w+)\s*\+\s*"([^"]+)"')
+	prefixPattern = re.compile(r'^\s*(\w+)\s*=\s*"(d:/ymir work/[^"]*/)"', re.IGNORECASE | re.MULTILINE)
+
+	for fileName in ICON_SOURCE_FILE_LIST:
+		source = open(os.path.join(sourceDirectory, fileName), "rU").read()
+
+		for path in literalPattern.findall(source):
+			pathSet.add(NormalizePath(path))
+
+		# FILE_PATH = "d:/ymir work/.../" ... FILE_PATH+"00.dds", the nearest assignment above wins
+		prefixList = [(match.start(), match.group(1), match.group(2)) for match in prefixPattern.finditer(source)]
+		for match in joinPattern.finditer(source):
+			(name, fileTail) = match.groups()
+			prefixPathList = [prefixPath for (position, prefixName, prefixPath) in prefixList if prefixName == name and position < match.start()]
+			if prefixPathList:
+				pathSet.add(NormalizePath(prefixPathList[-1] + fileTail))
+
+	return sorted([path for path in pathSet if os.path.splitext(path)[1] in ICON_EXT_LIST])
+
+def GetLocalPath(packRoot, path):
+	if path.startswith(PACK_ROOT_PREFIX):
+		path = path[len(PACK_ROOT_PREFIX):]
+
+	return os.path.join(packRoot, *path.split("/"))
+
+##
+## Headers
+##
+def ReadSubImage(localPath):
+	# title subImage / version / image "<texture>" / left / top / right / bottom
+	valueDict = {}
+	for line in open(localPath, "rU"):
+		tokenList = line.split(None, 1)
+		if len(tokenList) == 2:
+			valueDict[tokenList[0].lower()] = tokenList[1].strip().strip("\"")
+
+	left = int(valueDict.get("left", 0))
+	top = int(valueDict.get("top", 0))
+	right = int(valueDict["right"])
+	bottom = int(valueDict["bottom"])
+
+	texturePath = os.path.join(os.path.dirname(localPath), valueDict["image"])
+	return (texturePath, (left, top, right, bottom))
+
+def ReadTextureSize(localPath):
+	header = open(localPath, "rb").read(20)
+	ext = os.path.splitext(localPath)[1].lower()
+
+	if ".dds" == ext:
+		if len(header) < 20 or "DDS " != header[:4]:
+			raise ValueError, "not a dds file"
+		(height, width) = struct.unpack("<II", header[12:20])
+		return (width, height)
+
+	if ".tga" == ext:
+		if len(header) < 16:
+			raise ValueError, "not a tga file"
+		(width, height) = struct.unpack("<HH", header[12:16])
+		return (width, height)
+
+	raise ValueError, "unknown image type %s" % (ext)
+
+## returns (texture file, (left, top, right, bottom)) of an icon
+def ReadIcon(packRoot, path):
+	localPath = GetLocalPath(packRoot, path)
+
+	if ".sub" == os.path.splitext(path)[1]:
+		return ReadSubImage(localPath)
+
+	(width, height) = ReadTextureSize(localPath)
+	return (localPath, (0, 0, width, height))
+
+##
+## Packing
+##
+## Shelf packing, tallest icons first. Ties are broken by width and path
+## so the same icon list always packs the same way.
+##
+## sizeList : [ (path, width, height), ... ]
+## returns ([ (path, page, x, y, width, height), ... ], [ path too big for a page, ... ])
+def PackIcons(sizeList, pageWidth = ATLAS_PAGE_WIDTH, pageHeight = ATLAS_PAGE_HEIGHT, padding = ATLAS_PADDING):
+	placementList = []
+	oversizeList = []
+
+	page = 0
+	shelfY = 0
+	shelfHeight = 0
+	cursorX = 0
+
+	for (path, width, height) in sorted(sizeList, key = lambda (path, width, height): (-height, -width, path)):
+		paddedWidth = width + padding * 2
+		paddedHeight = height + padding * 2
+
+		if paddedWidth > pageWidth or paddedHeight > pageHeight:
+			oversizeList.append(path)
+			continue
+
+		# next shelf
+		if cursorX + paddedWidth > pageWidth:
+			shelfY += shelfHeight
+			shelfHeight = 0
+			cursorX = 0
+
+		# next page
+		if shelfY + paddedHeight > pageHeight:
+			page += 1
+			shelfY = 0
+			shelfHeight = 0
+			cursorX = 0
+
+		placementList.append((path, page, cursorX + padding, shelfY + padding, width, height))
+
+		cursorX += paddedWidth
+		shelfHeight = max(shelfHeight, paddedHeight)
+
+	return (placementList, oversizeList)
+
+def MakeReport(placementList, oversizeList, failedList, pageWidth = ATLAS_PAGE_WIDTH, pageHeight = ATLAS_PAGE_HEIGHT):
+	lineList = []
+
+	pageAreaDict = {}
+	for (path, page, x, y, width, height) in placementList:
+		pageAreaDict[page] = pageAreaDict.get(page, 0) + width * height
+
+	lineList.append("atlas %dx%d : %d icons, %d pages" % (pageWidth, pageHeight, len(placementList), len(pageAreaDict)))
+	for page in sorted(pageAreaDict):
+		lineList.append("page %d : %.1f%% used" % (page, pageAreaDict[page] * 100.0 / (pageWidth * pageHeight)))
+
+	for (path, page, x, y, width, height) in sorted(placementList, key = lambda placement: placement[1:4] + placement[:1]):
+		lineList.append("%d %4d %4d %4d %4d %s" % (page, x, y, width, height, path))
+
+	for path in sorted(oversizeList):
+		lineList.append("OVERSIZE %s" % (path))
+
+	for (path, msg) in sorted(failedList):
+		lineList.append("FAILED %s - %s" % (path, msg))
+
+	return "\n".join(lineList) + "\n"
+
+##
+## Output
+##
+def GetAtlasSubPath(path):
+	name = os.path.splitext(path[len(PACK_ROOT_PREFIX):] if path.startswith(PACK_ROOT_PREFIX) else path)[0]
+	return ATLAS_PATH + name.replace("/", "_") + ".sub"
+
+def MakeSubImage(pageName, x, y, width, height):
+	return "title subImage\nversion 1.0\nimage \"%s\"\nleft %d\ntop %d\nright %d\nbottom %d\n" % (pageName, x, y, x + width, y + height)
+
+def MakeDataModule(placementList, pageWidth = ATLAS_PAGE_WIDTH, pageHeight = ATLAS_PAGE_HEIGHT):
+	lineList = [
+		"## made by atlasbuilder.py, do not edit",
+		"",
+		"# icon path -> atlas sub image",
+		"ATLAS_SUB_IMAGE_DICT = {",
+	]
+	for (path, page, x, y, width, height) in placementList:
+		lineList.append("\t\"%s\" : \"%s\"," % (path, GetAtlasSubPath(path)))
+	lineList.append("}")
+	lineList.append("")
+
+	lineList.append("# icon path -> (page, u0, v0, u1, v1)")
+	lineList.append("ATLAS_UV_DICT = {")
+	for (path, page, x, y, width, height) in placementList:
+		lineList.append("\t\"%s\" : (%d, %.6f, %.6f, %.6f, %.6f)," % (path, page,
+			float(x) / pageWidth, float(y) / pageHeight, float(x + width) / pageWidth, float(y + height) / pageHeight))
+	lineList.append("}")
+
+	return "\n".join(lineList) + "\n"
+
+def ComposePages(iconDict, placementList, outputDirectory, pageWidth = ATLAS_PAGE_WIDTH, pageHeight = ATLAS_PAGE_HEIGHT):
+	from PIL import Image
+
+	pageImageDict = {}
+	textureDict = {}
+
+	for (path, page, x, y, width, height) in placementList:
+		(texturePath, rect) = iconDict[path]
+
+		texture = textureDict.get(texturePath)
+		if None == texture:
+			texture = Image.open(texturePath).convert("RGBA")
+			textureDict[texturePath] = texture
+
+		if not pageImageDict.has_key(page):
+			pageImageDict[page] = Image.new("RGBA", (pageWidth, pageHeight), (0, 0, 0, 0))
+
+		pageImageDict[page].paste(texture.crop(rect), (x, y))
+
+	for (page, pageImage) in pageImageDict.iteritems():
+		pageImage.save(os.path.join(outputDirectory, ATLAS_PAGE_NAME % (page)))
+
+def Build(packRoot, outputDirectory, sourceDirectory = "."):
+	iconDict = {}
+	sizeList = []
+	failedList = []
+
+	for path in CollectIconPathList(sourceDirectory):
+		try:
+			(texturePath, (left, top, right, bottom)) = ReadIcon(packRoot, path)
+		except (IOError, ValueError, KeyError), msg:
+			failedList.append((path, str(msg)))
+			continue
+
+		iconDict[path] = (texturePath, (left, top, right, bottom))
+		sizeList.append((path, right - left, bottom - top))
+
+	(placementList, oversizeList) = PackIcons(sizeList)
+
+	if not os.path.exists(outputDirectory):
+		os.makedirs(outputDirectory)
+
+	report = MakeReport(placementList, oversizeList, failedList)
+	open(os.path.join(outputDirectory, ATLAS_REPORT_NAME), "w").write(report)
+
+	try:
+		ComposePages(iconDict, placementList, outputDirectory)
+	except ImportError:
+		print "PIL is not installed, only %s is written" % (ATLAS_REPORT_NAME)
+		return (placementList, oversizeList, failedList, False)
+
+	for (path, page, x, y, width, height) in placementList:
+		subPath = GetAtlasSubPath(path)
+		open(os.path.join(outputDirectory, os.path.basename(subPath)), "w").write(MakeSubImage(ATLAS_PAGE_NAME % (page), x, y, width, height))
+
+	open(os.path.join(outputDirectory, ATLAS_DATA_MODULE_NAME), "w").write(MakeDataModule(placementList))
+	return (placementList, oversizeList, failedList, True)
+
+if __name__ == "__main__":
+	if len(sys.argv) < 4 or "build" != sys.argv[1]:
+		print "usage: python atlasbuilder.py build <extracted pack root> <output directory>"
+		sys.exit(1)
+
+	(placementList, oversizeList, failedList, isComposed) = Build(sys.argv[2], sys.argv[3])
+	print open(os.path.join(sys.argv[3], ATLAS_REPORT_NAME)).read()
+
+	if oversizeList or failedList:
+		sys.exit(1)
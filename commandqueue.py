@@ -0,0 +1,172 @@
+##
+## Command Queue
+##
+## Every server command the interface sends as a chat packet goes through
+## here instead of calling net.SendChatPacket directly.
+## Commands are queued, identical pending commands are collapsed and the
+## queue is flushed once per frame from GameWindow.OnUpdate, limited by a
+## token bucket per command class so UI spam can not flood the server.
+## Flush sends the pending answers to other players right away and drops
+## the rest, GameWindow.Close calls it.
+##
+import gameClock
+import net
+import constInfo
+
+COMMAND_CLASS_DEFAULT = "default"
+COMMAND_CLASS_CUBE = "cube"
+COMMAND_CLASS_PK_MODE = "pkmode"
+COMMAND_CLASS_BLOCK_MODE = "blockmode"
+COMMAND_CLASS_ANSWER = "answer"
+COMMAND_CLASS_HORSE = "horse"
+
+# commandClass : (tokens per second, bucket size, keep only the latest pending command)
+COMMAND_CLASS_DICT = {
+	COMMAND_CLASS_DEFAULT		: (4.0, 4, False),
+	COMMAND_CLASS_CUBE			: (4.0, 2, False),
+	COMMAND_CLASS_PK_MODE		: (1.0 / max(0.1, constInfo.PVPMODE_ACCELKEY_DELAY), 1, True),
+	COMMAND_CLASS_BLOCK_MODE	: (2.0, 1, True),
+	COMMAND_CLASS_ANSWER		: (4.0, 4, False),
+	COMMAND_CLASS_HORSE			: (2.0, 1, False),
+}
+
+COMMAND_CLASS_BY_VERB = {
+	"/cube"						: COMMAND_CLASS_CUBE,
+	"/pkmode"					: COMMAND_CLASS_PK_MODE,
+	"/setblockmode"				: COMMAND_CLASS_BLOCK_MODE,
+	"/party_request_accept"		: COMMAND_CLASS_ANSWER,
+	"/party_request_deny"		: COMMAND_CLASS_ANSWER,
+	"/messenger_auth"			: COMMAND_CLASS_ANSWER,
+	"/war"						: COMMAND_CLASS_ANSWER,
+	"/nowar"					: COMMAND_CLASS_ANSWER,
+	"/ride"						: COMMAND_CLASS_HORSE,
+	"/unmount"					: COMMAND_CLASS_HORSE,
+	"/user_horse_ride"			: COMMAND_CLASS_HORSE,
+	"/user_horse_back"			: COMMAND_CLASS_HORSE,
+	"/user_horse_feed"			: COMMAND_CLASS_HORSE,
+}
+
+# sent by Flush instead of being dropped, the other side is waiting for them
+FLUSH_COMMAND_CLASS_SET = set([ COMMAND_CLASS_ANSWER ])
+
+MAX_SEND_COUNT_PER_FRAME = 8
+
+class CommandQueue(object):
+
+	def __init__(self):
+		self.Clear()
+
+	def Clear(self):
+		# [command, chatType, commandClass, coalesceKey]
+		self.pendingList = []
+		self.pendingDict = {}
+		# commandClass -> [tokens, lastRefillTime]
+		self.bucketDict = {}
+		self.sendCount = 0
+		self.coalescedCount = 0
+
+	def __GetCommandClass(self, command):
+		verb = command.split(" ", 1)[0].lower()
+		return COMMAND_CLASS_BY_VERB.get(verb, COMMAND_CLASS_DEFAULT)
+
+	def Send(self, command, chatType = None):
+		commandClass = self.__GetCommandClass(command)
+
+		# the latest one of a class wins whatever chat type it was sent with
+		if COMMAND_CLASS_DICT[commandClass][2]:
+			coalesceKey = commandClass
+		else:
+			coalesceKey = command
+
+		if self.pendingDict.has_key(coalesceKey):
+			entry = self.pendingDict[coalesceKey]
+			entry[0] = command
+			entry[1] = chatType
+			self.coalescedCount += 1
+			return
+
+		entry = [command, chatType, commandClass, coalesceKey]
+		self.pendingList.append(entry)
+		self.pendingDict[coalesceKey] = entry
+
+	def __TakeToken(self, commandClass, curTime):
+		(rate, size, isLatestOnly) = COMMAND_CLASS_DICT[commandClass]
+
+		bucket = self.bucketDict.get(commandClass)
+		if not bucket:
+			bucket = [float(size), curTime]
+			self.bucketDict[commandClass] = bucket
+		else:
+			bucket[0] = min(float(size), bucket[0] + (curTime - bucket[1]) * rate)
+			bucket[1] = curTime
+
+		if bucket[0] < 1.0:
+			return False
+
+		bucket[0] -= 1.0
+		return True
+
+	def Update(self):
+		if not self.pendingList:
+			return
+
+		curTime = gameClock.GetTime()
+
+		sentCount = 0
+		blockedClassDict = {}
+		remainList = []
+
+		for entry in self.pendingList:
+			(command, chatType, commandClass, coalesceKey) = entry
+
+			if sentCount >= MAX_SEND_COUNT_PER_FRAME or blockedClassDict.has_key(commandClass):
+				remainList.append(entry)
+				continue
+
+			if not self.__TakeToken(commandClass, curTime):
+				blockedClassDict[commandClass] = True
+				remainList.append(entry)
+				continue
+
+			del self.pendingDict[coalesceKey]
+			self.__SendPacket(command, chatType)
+
+			sentCount += 1
+
+		self.pendingList = remainList
+		self.sendCount += sentCount
+
+	## sends the pending commands of FLUSH_COMMAND_CLASS_SET without waiting for tokens, drops the others
+	def Flush(self):
+		pendingList = self.pendingList
+
+		self.pendingList = []
+		self.pendingDict = {}
+
+		for (command, chatType, commandClass, coalesceKey) in pendingList:
+			if commandClass in FLUSH_COMMAND_CLASS_SET:
+				self.__SendPacket(command, chatType)
+				self.sendCount += 1
+
+	def __SendPacket(self, command, chatType):
+		if None == chatType:
+			net.SendChatPacket(command)
+		else:
+			net.SendChatPacket(command, chatType)
+
+	def GetStatistics(self):
+		return (self.sendCount, self.coalescedCount, len(self.pendingList))
+
+commandQueue = CommandQueue()
+
+def Send(command, chatType = None):
+	commandQueue.Send(command, chatType)
+
+def Update():
+	commandQueue.Update()
+
+def Flush():
+	commandQueue.Flush()
+
+def Clear():
+	commandQueue.Clear()
@@ -0,0 +1,119 @@
+##
+## Cube recipe cache
+##
+## Keeps the cube information that GameWindow downloads with "/cube r_info"
+## on disk, keyed by npc vnum and a hash of the npc's result list.
+## Recipes only change on server patches, so a known npc can be shown
+## from here right away and only the missing entries are requested.
+## A material change without a result list change is found by checking
+## one material reply per window open against the hash kept for it, the
+## reply checked the longest time ago first.
+##
+import time
+import marshal
+import hashlib
+
+CACHE_FILE_NAME = "cubeinfo.dat"
+CACHE_VERSION = 3
+
+# ex) cacheDict[20383] = ( "d41d8cd98f00b204e9800998ecf8427e", [ {"vnum": 72723, "count": 1, "materialList": [[(101, 1)], [(102, 2)], [], [], []]}, ... ], { 0: ("9e107d9d372bb6826bd81d3542a419d6", 1760000000.0), ... } )
+# the third item is material reply start index -> (hash of the reply, time it was last checked)
+cacheDict = {}
+isLoaded = False
+isChanged = False
+
+def GetListHash(listText):
+	return hashlib.md5(listText).hexdigest()
+
+def LoadCache():
+	global cacheDict, isLoaded, isChanged
+
+	isLoaded = True
+	isChanged = False
+	cacheDict = {}
+
+	try:
+		data = old_open(CACHE_FILE_NAME, "rb").read()
+	except IOError:
+		return
+
+	try:
+		(version, loadedDict) = marshal.loads(data)
+	except (EOFError, ValueError, TypeError):
+		import dbg
+		dbg.TraceError("cubeInfoCache.LoadCache - broken cache file %s" % (CACHE_FILE_NAME))
+		return
+
+	if CACHE_VERSION != version:
+		return
+
+	cacheDict = loadedDict
+
+def SaveCache():
+	global isChanged
+
+	if not isChanged:
+		return
+
+	try:
+		old_open(CACHE_FILE_NAME, "wb").write(marshal.dumps((CACHE_VERSION, cacheDict)))
+	except (IOError, ValueError), msg:
+		import dbg
+		dbg.TraceError("cubeInfoCache.SaveCache - %s" % (msg))
+		return
+
+	isChanged = False
+
+## returns (listHash, cubeInfoList) or None
+def GetCubeInfo(npcVNUM):
+	if not isLoaded:
+		LoadCache()
+
+	cached = cacheDict.get(npcVNUM, None)
+	if not cached:
+		return None
+
+	return cached[:2]
+
+def SetCubeInfo(npcVNUM, listHash, cubeInfoList):
+	global isChanged
+
+	if not isLoaded:
+		LoadCache()
+
+	cacheDict[npcVNUM] = (listHash, cubeInfoList, {})
+	isChanged = True
+
+def GetMaterialHash(npcVNUM, startIndex):
+	cached = cacheDict.get(npcVNUM, None)
+	if not cached:
+		return None
+
+	materialHashInfo = cached[2].get(startIndex, None)
+	if not materialHashInfo:
+		return None
+
+	return materialHashInfo[0]
+
+## the reply was applied to (or found in) the cubeInfoList of the npc
+def SetMaterialHash(npcVNUM, startIndex, materialHash):
+	global isChanged
+
+	cached = cacheDict.get(npcVNUM, None)
+	if not cached:
+		return
+
+	cached[2][startIndex] = (materialHash, time.time())
+	isChanged = True
+
+## start index of the material reply checked the longest time ago, or None
+def GetOldestMaterialStartIndex(npcVNUM):
+	cached = cacheDict.get(npcVNUM, None)
+	if not cached or not cached[2]:
+		return None
+
+	materialHashDict = cached[2]
+	return min(materialHashDict, key = lambda startIndex: materialHashDict[startIndex][1])
+
+def IsCompleteCubeInfo(cubeInfo):
+	return cubeInfo.has_key("materialList")
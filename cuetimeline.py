@@ -0,0 +1,57 @@
+##
+## Cue Timeline
+##
+## Runs scripted effects as a list of (time offset, action) cues.
+## All cues of all running timelines are kept in one heap ordered by due
+## time, so Update only looks at the earliest cue and costs nothing while
+## no cue is due.
+## Timelines are named, starting a timeline again or stopping it drops
+## the cues that are still waiting.
+##
+import gameClock
+import heapq
+
+class CueTimeline(object):
+
+	def __init__(self):
+		self.Clear()
+
+	def Clear(self):
+		# (dueTime, sequence, name, generation, action)
+		self.cueHeap = []
+		# name -> generation of the running timeline
+		self.generationDict = {}
+		self.sequence = 0
+
+	## cueList : [ (offset seconds, action), ... ]
+	def Start(self, name, cueList, startTime = None):
+		if None == startTime:
+			startTime = gameClock.GetTime()
+
+		generation = self.generationDict.get(name, 0) + 1
+		self.generationDict[name] = generation
+
+		for (offset, action) in cueList:
+			heapq.heappush(self.cueHeap, (startTime + offset, self.sequence, name, generation, action))
+			self.sequence += 1
+
+		self.Update()
+
+	def Stop(self, name):
+		if self.generationDict.has_key(name):
+			self.generationDict[name] += 1
+
+	def Update(self):
+		if not self.cueHeap:
+			return
+
+		curTime = gameClock.GetTime()
+		if self.cueHeap[0][0] > curTime:
+			return
+
+		while self.cueHeap and self.cueHeap[0][0] <= curTime:
+			(dueTime, sequence, name, generation, action) = heapq.heappop(self.cueHeap)
+			if generation != self.generationDict.get(name):
+				continue
+
+			action()
@@ -26,12 +26,13 @@ import exchange
 import ime
 
 import ui
+# the ui modules here are used while the GameWindow is built or are
+# imported by interfaceModule anyway, a lazy proxy would not defer them
 import uiCommon
 import uiPhaseCurtain
 import uiMapNameShower
 import uiAffectShower
 import uiPlayerGauge
-import uiCharacter
 import uiTarget
 
 # PRIVATE_SHOP_PRICE_LIST
@@ -48,12 +49,50 @@ import interfaceModule
 import musicInfo
 import debugInfo
 import stringCommander
+import cubeInfoCache
+import requestPipeline
+import commandQueue
+import updateScheduler
+import cueTimeline
+import screenShotQueue
+import lazyModule
+import uiScriptCache
+import startupTracer
+import playerStatus
+import gameClock
+import refreshPipeline
+import traceLog
 
 from _weakref import proxy
 
 # SCREENSHOT_CWDSAVE
 SCREENSHOT_CWDSAVE = True
 SCREENSHOT_DIR = None
+SCREENSHOT_BURST_COUNT = 5
+SCREENSHOT_BURST_INTERVAL = 0.5
+
+# CUBE
+CUBE_REQUEST_COUNT = 7
+CUBE_REQUEST_WINDOW_SIZE = 2
+# END_OF_CUBE
+
+# REFRESH_PIPELINE
+# (name, Interface method, runs after) in dependency order
+REFRESH_PIPELINE_LIST = (
+	("STATUS", "RefreshStatus", ()),
+	("CHARACTER", "RefreshCharacter", ("STATUS",)),
+	("SKILL", "RefreshSkill", ("CHARACTER",)),
+	("INVENTORY", "RefreshInventory", ("CHARACTER",)),
+	("QUEST", "RefreshQuest", ()),
+	("MESSENGER", "RefreshMessenger", ()),
+	("GUILD_INFO", "RefreshGuildInfoPage", ()),
+	("GUILD_BOARD", "RefreshGuildBoardPage", ()),
+	("GUILD_GRADE", "RefreshGuildGradePage", ()),
+	("GUILD_MEMBER", "RefreshGuildMemberPage", ()),
+	("GUILD_MEMBER_GRADE", "RefreshGuildMemberPageGradeComboBox", ("GUILD_GRADE", "GUILD_MEMBER")),
+	("GUILD_SKILL", "RefreshGuildSkillPage", ()),
+)
+# END_OF_REFRESH_PIPELINE
 
 cameraDistance = 1550.0
 cameraPitch = 27.0
@@ -64,13 +103,15 @@ testAlignment = 0
 
 class GameWindow(ui.ScriptWindow):
 	def __init__(self, stream):
+		startupTracer.Start("game_startup")
+		startupTracer.Begin("GameWindow.__init__")
+
 		ui.ScriptWindow.__init__(self, "GAME")
 		self.SetWindowName("game")
 		net.SetPhaseWindow(net.PHASE_WINDOW_GAME, self)
 		player.SetGameWindow(self)
 
 		self.quickSlotPageIndex = 0
-		self.lastPKModeSendedTime = 0
 		self.pressNumber = None
 
 		self.guildWarQuestionDialog = None
@@ -82,45 +123,68 @@ class GameWindow(ui.ScriptWindow):
 		self.playerGauge = None
 
 		self.stream=stream
+		uiScriptCache.Install()
+
+		startupTracer.Begin("interface")
+		startupTracer.Begin("Interface.MakeInterface")
 		self.interface = interfaceModule.Interface()
 		self.interface.MakeInterface()
+		startupTracer.End()
 		self.interface.ShowDefaultWindows()
+		startupTracer.End()
 
 		self.curtain = uiPhaseCurtain.PhaseCurtain()
 		self.curtain.speed = 0.03
 		self.curtain.Hide()
 
+		startupTracer.Begin("uiTarget")
 		self.targetBoard = uiTarget.TargetBoard()
 		self.targetBoard.SetWhisperEvent(ui.__mem_func__(self.interface.OpenWhisperDialog))
 		self.targetBoard.Hide()
+		startupTracer.End()
 
+		startupTracer.Begin("consoleModule")
 		self.console = consoleModule.ConsoleWindow()
 		self.console.BindGameClass(self)
 		self.console.SetConsoleSize(wndMgr.GetScreenWidth(), 200)
 		self.console.Hide()
+		startupTracer.End()
 
+		startupTracer.Begin("uiMapNameShower, uiAffectShower")
 		self.mapNameShower = uiMapNameShower.MapNameShower()
 		self.affectShower = uiAffectShower.AffectShower()
+		startupTracer.End()
 
+		startupTracer.Begin("PlayerGauge")
 		self.playerGauge = uiPlayerGauge.PlayerGauge(self)
 		self.playerGauge.Hide()
+		startupTracer.End()
 
 		self.itemDropQuestionDialog = None
 
+		self.refreshPipeline = refreshPipeline.RefreshPipeline()
+		self.__RefreshPipeline_Build()
+
 		self.__SetQuickSlotMode()
 
+		startupTracer.Begin("ServerCommand_Build")
 		self.__ServerCommand_Build()
 		self.__ProcessPreservedServerCommand()
+		startupTracer.End()
 
 		self.partyRequestQuestionDialog = None
 		self.partyInviteQuestionDialog = None
 
+		startupTracer.End()
+
 	def __del__(self):
 		player.SetGameWindow(0)
 		net.ClearPhaseWindow(net.PHASE_WINDOW_GAME, self)
 		ui.ScriptWindow.__del__(self)
 
 	def Open(self):
+		startupTracer.Begin("GameWindow.Open")
+
 		app.SetFrameSkip(1)
 
 		self.SetSize(wndMgr.GetScreenWidth(), wndMgr.GetScreenHeight())
@@ -132,10 +196,17 @@ class GameWindow(ui.ScriptWindow):
 		self.isShowDebugInfo = False
 		self.ShowNameFlag = False
 
-		self.enableXMasBoom = False
-		self.startTimeXMasBoom = 0.0
-		self.indexXMasBoom = 0
+		self.cueTimeline = cueTimeline.CueTimeline()
+
+		self.screenShotQueue = screenShotQueue.ScreenShotQueue(SCREENSHOT_BURST_COUNT + 1)
+		self.screenShotQueue.SetSaveEvent(ui.__mem_func__(self.__SaveScreen_Capture))
+		self.screenShotQueue.SetResultEvent(ui.__mem_func__(self.__SaveScreen_OnResult))
+		# SCREENSHOT_CWDSAVE
+		if SCREENSHOT_CWDSAVE:
+			self.screenShotQueue.SetDirectory(os.getcwd()+os.sep+"screenshot")
+		# END_OF_SCREENSHOT_CWDSAVE
 
+		startupTracer.Begin("camera, constInfo")
 		global cameraDistance, cameraPitch, cameraRotation, cameraHeight
 
 		app.SetCamera(cameraDistance, cameraPitch, cameraRotation, cameraHeight)
@@ -150,6 +221,7 @@ class GameWindow(ui.ScriptWindow):
 		# TWO_HANDED_WEAPON_ATTACK_SPEED_UP
 		constInfo.SET_TWO_HANDED_WEAPON_ATT_SPEED_DECREASE_VALUE()
 		# END_OF_TWO_HANDED_WEAPON_ATTACK_SPEED_UP
+		startupTracer.End()
 
 		import event
 		event.SetLeftTimeString(localeInfo.UI_LEFT_TIME)
@@ -175,8 +247,10 @@ class GameWindow(ui.ScriptWindow):
 			self.testAlignment.SetOutline()
 			self.testAlignment.Show()
 
+		startupTracer.Begin("BuildKeyDict")
 		self.__BuildKeyDict()
 		self.__BuildDebugInfo()
+		startupTracer.End()
 
 		# PRIVATE_SHOP_PRICE_LIST
 		uiPrivateShopBuilder.Clear()
@@ -188,6 +262,7 @@ class GameWindow(ui.ScriptWindow):
 
 
 		## Sound
+		startupTracer.Begin("music")
 		snd.SetMusicVolume(systemSetting.GetMusicVolume()*net.GetFieldMusicVolume())
 		snd.SetSoundVolume(systemSetting.GetSoundVolume())
 
@@ -196,6 +271,7 @@ class GameWindow(ui.ScriptWindow):
 			snd.FadeInMusic("BGM/" + netFieldMusicFileName)
 		elif musicInfo.fieldMusic != "":
 			snd.FadeInMusic("BGM/" + musicInfo.fieldMusic)
+		startupTracer.End()
 
 		self.__SetQuickSlotMode()
 		self.__SelectQuickPage(self.quickSlotPageIndex)
@@ -204,8 +280,11 @@ class GameWindow(ui.ScriptWindow):
 		self.Show()
 		app.ShowCursor()
 
+		startupTracer.Begin("SendEnterGamePacket")
 		net.SendEnterGamePacket()
+		startupTracer.End()
 
+		startupTracer.Begin("StartGame")
 		# START_GAME_ERROR_EXIT
 		try:
 			self.StartGame()
@@ -213,10 +292,20 @@ class GameWindow(ui.ScriptWindow):
 			import exception
 			exception.Abort("GameWindow.Open")
 		# END_OF_START_GAME_ERROR_EXIT
+		startupTracer.End()
 
 		# ex) cubeInformation[20383] = [ {"rewordVNUM": 72723, "rewordCount": 1, "materialInfo": "101,1&102,2", "price": 999 }, ... ]
 		self.cubeInformation = {}
 		self.currentCubeNPC = 0
+		self.cubeRenderedFromCache = 0
+		self.cubeRequestFirstSlotIndex = 0
+
+		self.cubeRequestPipeline = requestPipeline.RequestPipeline(CUBE_REQUEST_WINDOW_SIZE)
+		self.cubeRequestPipeline.SetPriorityEvent(ui.__mem_func__(self.__Cube_GetRequestPriority))
+		self.cubeRequestPipeline.SetSendEvent(commandQueue.Send)
+
+		startupTracer.End()
+		startupTracer.Begin("first frame")
 
 	def Close(self):
 		self.Hide()
@@ -272,6 +361,11 @@ class GameWindow(ui.ScriptWindow):
 
 		self.ClearDictionary()
 
+		if self.playerGauge:
+			self.playerGauge.Destroy()
+		if self.affectShower:
+			self.affectShower.Destroy()
+
 		self.playerGauge = None
 		self.mapNameShower = None
 		self.affectShower = None
@@ -298,7 +392,21 @@ class GameWindow(ui.ScriptWindow):
 
 		constInfo.SET_ITEM_QUESTION_DIALOG_STATUS(0)
 
-		print("---------------------------------------------------------------------------- CLOSE GAME WINDOW")
+		cubeInfoCache.SaveCache()
+		uiScriptCache.SaveCache()
+		# modules this session imported through lazyModule
+		lazyModule.LogImportReport()
+		self.refreshPipeline.LogStatistics()
+		self.refreshPipeline.Clear()
+		self.cueTimeline.Clear()
+		self.screenShotQueue.Clear()
+		commandQueue.Flush()
+		updateScheduler.Clear()
+		playerStatus.Reset()
+		gameClock.Reset()
+
+		traceLog.Info("game", "CLOSE GAME WINDOW")
+		traceLog.Flush()
 
 	def __BuildKeyDict(self):
 		onPressKeyDict = {}
@@ -427,7 +535,7 @@ class GameWindow(ui.ScriptWindow):
 	def	__PressJKey(self):
 		if app.IsPressed(app.DIK_LCONTROL) or app.IsPressed(app.DIK_RCONTROL):
 			if player.IsMountingHorse():
-				net.SendChatPacket("/unmount")
+				commandQueue.Send("/unmount")
 			else:
 				#net.SendChatPacket("/user_horse_ride")
 				if not uiPrivateShopBuilder.IsBuildingPrivateShop():
@@ -437,26 +545,26 @@ class GameWindow(ui.ScriptWindow):
 							break
 	def	__PressHKey(self):
 		if app.IsPressed(app.DIK_LCONTROL) or app.IsPressed(app.DIK_RCONTROL):
-			net.SendChatPacket("/user_horse_ride")
+			commandQueue.Send("/user_horse_ride")
 		else:
 			self.interface.OpenHelpWindow()
 
 	def	__PressBKey(self):
 		if app.IsPressed(app.DIK_LCONTROL) or app.IsPressed(app.DIK_RCONTROL):
-			net.SendChatPacket("/user_horse_back")
+			commandQueue.Send("/user_horse_back")
 		else:
 			state = "EMOTICON"
 			self.interface.ToggleCharacterWindow(state)
 
 	def	__PressFKey(self):
 		if app.IsPressed(app.DIK_LCONTROL) or app.IsPressed(app.DIK_RCONTROL):
-			net.SendChatPacket("/user_horse_feed")
+			commandQueue.Send("/user_horse_feed")
 		else:
 			app.ZoomCamera(app.CAMERA_TO_POSITIVE)
 
 	def __PressGKey(self):
 		if app.IsPressed(app.DIK_LCONTROL) or app.IsPressed(app.DIK_RCONTROL):
-			net.SendChatPacket("/ride")
+			commandQueue.Send("/ride")
 		else:
 			if self.ShowNameFlag:
 				self.interface.ToggleGuildWindow()
@@ -494,7 +602,12 @@ class GameWindow(ui.ScriptWindow):
 
 	def __SelectQuickPage(self, pageIndex):
 		self.quickSlotPageIndex = pageIndex
+		self.__SetQuickPage(pageIndex)
+
+	def __SetQuickPage(self, pageIndex):
 		player.SetQuickPage(pageIndex)
+		if self.interface:
+			self.interface.RefreshQuickPage()
 
 	def ToggleDebugInfo(self):
 		self.isShowDebugInfo = not self.isShowDebugInfo
@@ -565,16 +678,10 @@ class GameWindow(ui.ScriptWindow):
 		if not app.IsPressed(app.DIK_LCONTROL):
 			return
 
-		if player.GetStatus(player.LEVEL)<constInfo.PVPMODE_PROTECTED_LEVEL:
+		if playerStatus.Get(player.LEVEL)<constInfo.PVPMODE_PROTECTED_LEVEL:
 			self.__NotifyError(localeInfo.OPTION_PVPMODE_PROTECT % (constInfo.PVPMODE_PROTECTED_LEVEL))
 			return
 
-		curTime = app.GetTime()
-		if curTime - self.lastPKModeSendedTime < constInfo.PVPMODE_ACCELKEY_DELAY:
-			return
-
-		self.lastPKModeSendedTime = curTime
-
 		curPKMode = player.GetPKMode()
 		nextPKMode = curPKMode + 1
 		if nextPKMode == player.PK_MODE_PROTECT:
@@ -587,7 +694,7 @@ class GameWindow(ui.ScriptWindow):
 		elif nextPKMode == player.PK_MODE_MAX_NUM:
 			nextPKMode = 0
 
-		net.SendChatPacket("/PKMode " + str(nextPKMode))
+		commandQueue.Send("/PKMode " + str(nextPKMode))
 		print "/PKMode " + str(nextPKMode)
 
 	def OnChangePKMode(self):
@@ -625,46 +732,51 @@ class GameWindow(ui.ScriptWindow):
 	def RefreshAlignment(self):
 		self.interface.RefreshAlignment()
 
+	## the task bar, energy bar, game buttons and player gauge follow playerStatus
 	def RefreshStatus(self):
-		self.CheckGameButton()
-
-		if self.interface:
-			self.interface.RefreshStatus()
-
-		if self.playerGauge:
-			self.playerGauge.RefreshGauge()
+		playerStatus.Invalidate()
+		self.refreshPipeline.Request("STATUS")
 
 	def RefreshStamina(self):
-		self.interface.RefreshStamina()
+		playerStatus.Invalidate()
 
 	def RefreshSkill(self):
-		self.CheckGameButton()
-		if self.interface:
-			self.interface.RefreshSkill()
+		self.refreshPipeline.Request("SKILL")
 
 	def RefreshQuest(self):
-		self.interface.RefreshQuest()
+		self.refreshPipeline.Request("QUEST")
 
 	def RefreshMessenger(self):
-		self.interface.RefreshMessenger()
+		self.refreshPipeline.Request("MESSENGER")
 
 	def RefreshGuildInfoPage(self):
-		self.interface.RefreshGuildInfoPage()
+		self.refreshPipeline.Request("GUILD_INFO")
 
 	def RefreshGuildBoardPage(self):
-		self.interface.RefreshGuildBoardPage()
+		self.refreshPipeline.Request("GUILD_BOARD")
 
 	def RefreshGuildMemberPage(self):
-		self.interface.RefreshGuildMemberPage()
+		self.refreshPipeline.Request("GUILD_MEMBER")
 
 	def RefreshGuildMemberPageGradeComboBox(self):
-		self.interface.RefreshGuildMemberPageGradeComboBox()
+		self.refreshPipeline.Request("GUILD_MEMBER_GRADE")
 
 	def RefreshGuildSkillPage(self):
-		self.interface.RefreshGuildSkillPage()
+		self.refreshPipeline.Request("GUILD_SKILL")
 
 	def RefreshGuildGradePage(self):
-		self.interface.RefreshGuildGradePage()
+		self.refreshPipeline.Request("GUILD_GRADE")
+
+	# REFRESH_PIPELINE
+	def __RefreshPipeline_Build(self):
+		gameWindow = proxy(self)
+		for (name, interfaceFuncName, afterNameList) in REFRESH_PIPELINE_LIST:
+			self.refreshPipeline.Register(name, lambda funcName=interfaceFuncName: gameWindow.__RefreshPipeline_Run(funcName), afterNameList)
+
+	def __RefreshPipeline_Run(self, interfaceFuncName):
+		if self.interface:
+			getattr(self.interface, interfaceFuncName)()
+	# END_OF_REFRESH_PIPELINE
 
 	def OnBlockMode(self, mode):
 		self.interface.OnBlockMode(mode)
@@ -753,16 +865,13 @@ class GameWindow(ui.ScriptWindow):
 			self.interface.OnDeactivateSkill(slotIndex)
 
 	def RefreshEquipment(self):
-		if self.interface:
-			self.interface.RefreshInventory()
+		self.refreshPipeline.Request("INVENTORY")
 
 	def RefreshInventory(self):
-		if self.interface:
-			self.interface.RefreshInventory()
+		self.refreshPipeline.Request("INVENTORY")
 
 	def RefreshCharacter(self):
-		if self.interface:
-			self.interface.RefreshCharacter()
+		self.refreshPipeline.Request("CHARACTER")
 
 	def OnGameOver(self):
 		self.CloseTargetBoard()
@@ -1005,13 +1114,13 @@ class GameWindow(ui.ScriptWindow):
 
 	def OnAcceptAddFriend(self):
 		name = self.messengerAddFriendQuestion.name
-		net.SendChatPacket("/messenger_auth y " + name)
+		commandQueue.Send("/messenger_auth y " + name)
 		self.OnCloseAddFriendQuestionDialog()
 		return True
 
 	def OnDenyAddFriend(self):
 		name = self.messengerAddFriendQuestion.name
-		net.SendChatPacket("/messenger_auth n " + name)
+		commandQueue.Send("/messenger_auth n " + name)
 		self.OnCloseAddFriendQuestionDialog()
 		return True
 
@@ -1089,22 +1198,30 @@ class GameWindow(ui.ScriptWindow):
 	def SaveScreen(self):
 		print "save screen"
 
+		# SHIFT+SYSRQ takes a burst of screenshots
+		if app.IsPressed(app.DIK_LSHIFT) or app.IsPressed(app.DIK_RSHIFT):
+			self.screenShotQueue.StartBurst(SCREENSHOT_BURST_COUNT, SCREENSHOT_BURST_INTERVAL)
+		else:
+			self.screenShotQueue.Request()
+
+	def __SaveScreen_Capture(self):
 		# SCREENSHOT_CWDSAVE
+		# the queue has made the directory
 		if SCREENSHOT_CWDSAVE:
-			if not os.path.exists(os.getcwd()+os.sep+"screenshot"):
-				os.mkdir(os.getcwd()+os.sep+"screenshot")
-
-			(succeeded, name) = grp.SaveScreenShotToPath(os.getcwd()+os.sep+"screenshot"+os.sep)
+			return grp.SaveScreenShotToPath(os.getcwd()+os.sep+"screenshot"+os.sep)
 		elif SCREENSHOT_DIR:
-			(succeeded, name) = grp.SaveScreenShot(SCREENSHOT_DIR)
+			return grp.SaveScreenShot(SCREENSHOT_DIR)
 		else:
-			(succeeded, name) = grp.SaveScreenShot()
+			return grp.SaveScreenShot()
 		# END_OF_SCREENSHOT_CWDSAVE
 
+	def __SaveScreen_OnResult(self, succeeded, name):
 		if succeeded:
 			chat.AppendChat(chat.CHAT_TYPE_INFO, "%s %s %s" % (name, localeInfo.SCREENSHOT_SAVE1, localeInfo.SCREENSHOT_SAVE2))
 		else:
 			chat.AppendChat(chat.CHAT_TYPE_INFO, localeInfo.SCREENSHOT_SAVE_FAILURE)
+			# ex) the directory was removed while playing
+			self.screenShotQueue.InvalidateDirectory()
 
 	def ShowConsole(self):
 		if debugInfo.IsDebugMode() or True == self.consoleEnable:
@@ -1114,7 +1231,7 @@ class GameWindow(ui.ScriptWindow):
 	def ShowName(self):
 		self.ShowNameFlag = True
 		self.playerGauge.EnableShowAlways()
-		player.SetQuickPage(self.quickSlotPageIndex+1)
+		self.__SetQuickPage(self.quickSlotPageIndex+1)
 
 	# ADD_ALWAYS_SHOW_NAME
 	def __IsShowName(self):
@@ -1131,7 +1248,7 @@ class GameWindow(ui.ScriptWindow):
 	def HideName(self):
 		self.ShowNameFlag = False
 		self.playerGauge.DisableShowAlways()
-		player.SetQuickPage(self.quickSlotPageIndex)
+		self.__SetQuickPage(self.quickSlotPageIndex)
 
 	def ShowMouseImage(self):
 		self.interface.ShowMouseImage()
@@ -1177,7 +1294,7 @@ class GameWindow(ui.ScriptWindow):
 	## Event Handler
 
 	def OnKeyDown(self, key):
-		if self.interface and self.interface.wndWeb and self.interface.wndWeb.IsShow():
+		if self.interface and self.interface.IsWindowBuilt("wndWeb") and self.interface.wndWeb.IsShow():
 			return
 
 		if key == app.DIK_ESC:
@@ -1466,16 +1583,29 @@ class GameWindow(ui.ScriptWindow):
 		player.SetMouseMiddleButtonState(player.MBS_CLICK)
 
 	def OnUpdate(self):
+		# before UpdateGame, the packets handled there read this frame's time
+		gameClock.Tick()
 		app.UpdateGame()
 
+		if startupTracer.IsTracing():
+			startupTracer.Flush()
+
 		if self.mapNameShower.IsShow():
 			self.mapNameShower.Update()
 
 		if self.isShowDebugInfo:
 			self.UpdateDebugInfo()
 
-		if self.enableXMasBoom:
-			self.__XMasBoom_Update()
+		self.cueTimeline.Update()
+		self.screenShotQueue.Update()
+
+		if not self.cubeRequestPipeline.IsIdle():
+			self.__Cube_UpdateRequestPriority()
+			self.cubeRequestPipeline.Update()
+		commandQueue.Update()
+		self.refreshPipeline.Flush()
+		playerStatus.Update()
+		updateScheduler.Update()
 
 		self.interface.BUILD_OnUpdate()
 
@@ -1617,31 +1747,84 @@ class GameWindow(ui.ScriptWindow):
 	# CUBE
 	def BINARY_Cube_Open(self, npcVNUM):
 		self.currentCubeNPC = npcVNUM
+		self.cubeRenderedFromCache = 0
+		self.cubeRequestPipeline.Clear()
 
 		self.interface.OpenCubeWindow()
 
 
 		if npcVNUM not in self.cubeInformation:
-			net.SendChatPacket("/cube r_info")
+			cachedInfo = cubeInfoCache.GetCubeInfo(npcVNUM)
+			if cachedInfo:
+				(listHash, cubeInfoList) = cachedInfo
+				self.__Cube_AppendCubeInfoList(cubeInfoList)
+				self.cubeRenderedFromCache = npcVNUM
+
+			commandQueue.Send("/cube r_info")
 		else:
-			cubeInfoList = self.cubeInformation[npcVNUM]
+			self.__Cube_AppendCubeInfoList(self.cubeInformation[npcVNUM])
 
-			i = 0
-			for cubeInfo in cubeInfoList:
-				self.interface.wndCube.AddCubeResultItem(cubeInfo["vnum"], cubeInfo["count"])
+	def __Cube_AppendCubeInfoList(self, cubeInfoList):
+		i = 0
+		for cubeInfo in cubeInfoList:
+			self.interface.wndCube.AddCubeResultItem(cubeInfo["vnum"], cubeInfo["count"])
 
-				j = 0
-				for materialList in cubeInfo["materialList"]:
-					for materialInfo in materialList:
-						itemVnum, itemCount = materialInfo
-						self.interface.wndCube.AddMaterialInfo(i, j, itemVnum, itemCount)
-					j = j + 1
+			j = 0
+			for materialList in cubeInfo.get("materialList", ()):
+				for materialInfo in materialList:
+					itemVnum, itemCount = materialInfo
+					self.interface.wndCube.AddMaterialInfo(i, j, itemVnum, itemCount)
+				j = j + 1
 
-				i = i + 1
+			i = i + 1
 
-			self.interface.wndCube.Refresh()
+		self.interface.wndCube.Refresh()
+
+	def __Cube_RequestMaterialInfo(self, indexList):
+		requestCount = CUBE_REQUEST_COUNT
+
+		startIndex = -1
+		count = 0
+		for index in indexList:
+			if count > 0 and (index != startIndex + count or count == requestCount):
+				#print("/cube r_info %d %d" % (startIndex, count))
+				self.cubeRequestPipeline.Push(startIndex, "/cube r_info %d %d" % (startIndex, count))
+				count = 0
+
+			if 0 == count:
+				startIndex = index
+
+			count = count + 1
+
+		if 0 < count:
+			#print("/cube r_info %d %d" % (startIndex, count))
+			self.cubeRequestPipeline.Push(startIndex, "/cube r_info %d %d" % (startIndex, count))
+
+	## The pending requests are sorted again only when wndCube scrolled
+	def __Cube_UpdateRequestPriority(self):
+		firstIndex = getattr(self.interface.wndCube, "firstSlotIndex", 0)
+		if firstIndex == self.cubeRequestFirstSlotIndex:
+			return
+
+		self.cubeRequestFirstSlotIndex = firstIndex
+		self.cubeRequestPipeline.RefreshPriority()
+
+	## Chunks showing in wndCube first, then by distance to the shown rows
+	def __Cube_GetRequestPriority(self, startIndex):
+		wndCube = self.interface.wndCube
+		firstIndex = getattr(wndCube, "firstSlotIndex", 0)
+		visibleCount = getattr(wndCube, "RESULT_SLOT_COUNT", CUBE_REQUEST_COUNT)
+
+		if startIndex + CUBE_REQUEST_COUNT <= firstIndex:
+			return firstIndex - (startIndex + CUBE_REQUEST_COUNT) + 1
+
+		if startIndex >= firstIndex + visibleCount:
+			return startIndex - (firstIndex + visibleCount) + 1
+
+		return 0
 
 	def BINARY_Cube_Close(self):
+		self.cubeRequestPipeline.Clear()
 		self.interface.CloseCubeWindow()
 
 	def BINARY_Cube_UpdateInfo(self, gold, itemVnum, count):
@@ -1661,6 +1844,30 @@ class GameWindow(ui.ScriptWindow):
 		if npcVNUM == 0:
 			npcVNUM = self.currentCubeNPC
 
+		listHash = cubeInfoCache.GetListHash(listText)
+		cachedInfo = cubeInfoCache.GetCubeInfo(npcVNUM)
+
+		if cachedInfo and listHash == cachedInfo[0]:
+			cubeInfoList = cachedInfo[1]
+			self.cubeInformation[npcVNUM] = cubeInfoList
+
+			if npcVNUM != self.cubeRenderedFromCache:
+				self.__Cube_AppendCubeInfoList(cubeInfoList)
+
+			self.cubeRenderedFromCache = npcVNUM
+
+			self.__Cube_RequestMaterialInfo([i for i in xrange(len(cubeInfoList)) if not cubeInfoCache.IsCompleteCubeInfo(cubeInfoList[i])])
+
+			# materials may change without the result list, one reply is checked again per open
+			checkStartIndex = cubeInfoCache.GetOldestMaterialStartIndex(npcVNUM)
+			if None != checkStartIndex:
+				self.__Cube_RequestMaterialInfo(range(checkStartIndex, min(checkStartIndex + CUBE_REQUEST_COUNT, len(cubeInfoList))))
+			return
+
+		if npcVNUM == self.cubeRenderedFromCache:
+			self.interface.wndCube.ClearCubeResultItem()
+			self.cubeRenderedFromCache = 0
+
 		self.cubeInformation[npcVNUM] = []
 
 		try:
@@ -1672,17 +1879,10 @@ class GameWindow(ui.ScriptWindow):
 				self.cubeInformation[npcVNUM].append({"vnum": itemVnum, "count": itemCount})
 				self.interface.wndCube.AddCubeResultItem(itemVnum, itemCount)
 
-			resultCount = len(self.cubeInformation[npcVNUM])
-			requestCount = 7
-			modCount = resultCount % requestCount
-			splitCount = resultCount / requestCount
-			for i in xrange(splitCount):
-				#print("/cube r_info %d %d" % (i * requestCount, requestCount))
-				net.SendChatPacket("/cube r_info %d %d" % (i * requestCount, requestCount))
+			cubeInfoCache.SetCubeInfo(npcVNUM, listHash, self.cubeInformation[npcVNUM])
 
-			if 0 < modCount:
-				#print("/cube r_info %d %d" % (splitCount * requestCount, modCount))
-				net.SendChatPacket("/cube r_info %d %d" % (splitCount * requestCount, modCount))
+			resultCount = len(self.cubeInformation[npcVNUM])
+			self.__Cube_RequestMaterialInfo(range(resultCount))
 
 		except RuntimeError, msg:
 			dbg.TraceError(msg)
@@ -1692,6 +1892,11 @@ class GameWindow(ui.ScriptWindow):
 
 	def BINARY_Cube_MaterialInfo(self, startIndex, listCount, listText):
 		# Material Text Format : 125,1|126,2|127,2|123,5&555,5&555,4/120000
+
+		# a second reply to a request sent again, or a reply to a closed cube window
+		if not self.cubeRequestPipeline.OnReply(startIndex):
+			return 0
+
 		try:
 			#print listText
 
@@ -1701,6 +1906,15 @@ class GameWindow(ui.ScriptWindow):
 
 
 
+			materialHash = cubeInfoCache.GetListHash(listText)
+			if materialHash == cubeInfoCache.GetMaterialHash(self.currentCubeNPC, startIndex):
+				# already shown from the cache, only the check time is kept
+				cubeInfoCache.SetMaterialHash(self.currentCubeNPC, startIndex, materialHash)
+				return
+
+			# entries shown from the cache are shown again as a whole
+			isRenderedFromCache = self.currentCubeNPC == self.cubeRenderedFromCache
+
 			eachResultList = listText.split("@")
 
 			cubeInfo = self.cubeInformation[self.currentCubeNPC]
@@ -1727,7 +1941,8 @@ class GameWindow(ui.ScriptWindow):
 							(itemVnum, itemCount) = complicatedText.split(",")
 							itemVnum = int(itemVnum)
 							itemCount = int(itemCount)
-							self.interface.wndCube.AddMaterialInfo(itemIndex + startIndex, i, itemVnum, itemCount)
+							if not isRenderedFromCache:
+								self.interface.wndCube.AddMaterialInfo(itemIndex + startIndex, i, itemVnum, itemCount)
 
 							materialList[i].append((itemVnum, itemCount))
 
@@ -1735,7 +1950,8 @@ class GameWindow(ui.ScriptWindow):
 						itemVnum, itemCount = eachMaterialText.split(",")
 						itemVnum = int(itemVnum)
 						itemCount = int(itemCount)
-						self.interface.wndCube.AddMaterialInfo(itemIndex + startIndex, i, itemVnum, itemCount)
+						if not isRenderedFromCache:
+							self.interface.wndCube.AddMaterialInfo(itemIndex + startIndex, i, itemVnum, itemCount)
 
 						materialList[i].append((itemVnum, itemCount))
 
@@ -1745,7 +1961,13 @@ class GameWindow(ui.ScriptWindow):
 
 				itemIndex = itemIndex + 1
 
-			self.interface.wndCube.Refresh()
+			cubeInfoCache.SetMaterialHash(self.currentCubeNPC, startIndex, materialHash)
+
+			if isRenderedFromCache:
+				self.interface.wndCube.ClearCubeResultItem()
+				self.__Cube_AppendCubeInfoList(cubeInfo)
+			else:
+				self.interface.wndCube.Refresh()
 
 
 		except RuntimeError, msg:
@@ -1851,7 +2073,7 @@ class GameWindow(ui.ScriptWindow):
 
 		guildName = self.guildWarQuestionDialog.GetGuildName()
 
-		net.SendChatPacket("/war " + guildName)
+		commandQueue.Send("/war " + guildName)
 		self.__GuildWar_CloseAskDialog()
 
 		return 1
@@ -1860,7 +2082,7 @@ class GameWindow(ui.ScriptWindow):
 
 		guildName = self.guildWarQuestionDialog.GetGuildName()
 
-		net.SendChatPacket("/nowar " + guildName)
+		commandQueue.Send("/nowar " + guildName)
 		self.__GuildWar_CloseAskDialog()
 
 		return 1
@@ -1931,7 +2153,7 @@ class GameWindow(ui.ScriptWindow):
 		try:
 			command = net.GetPreservedServerCommand()
 			while command:
-				print " __ProcessPreservedServerCommand", command
+				traceLog.Debug("command", "__ProcessPreservedServerCommand %s", command)
 				self.serverCommander.Run(command)
 				command = net.GetPreservedServerCommand()
 		except RuntimeError, msg:
@@ -1997,11 +2219,11 @@ class GameWindow(ui.ScriptWindow):
 			if not self.__IsXMasMap():
 				return
 
-			print "XMAS_SNOW ON"
+			traceLog.Info("xmas", "XMAS_SNOW ON")
 			background.EnableSnow(1)
 
 		else:
-			print "XMAS_SNOW OFF"
+			traceLog.Info("xmas", "XMAS_SNOW OFF")
 			background.EnableSnow(0)
 
 	def __XMasBoom_Enable(self, mode):
@@ -2010,23 +2232,22 @@ class GameWindow(ui.ScriptWindow):
 			if not self.__IsXMasMap():
 				return
 
-			print "XMAS_BOOM ON"
+			traceLog.Info("xmas", "XMAS_BOOM ON")
 			self.__DayMode_Update("dark")
-			self.enableXMasBoom = True
-			self.startTimeXMasBoom = app.GetTime()
+			self.__XMasBoom_Start()
 		else:
-			print "XMAS_BOOM OFF"
+			traceLog.Info("xmas", "XMAS_BOOM OFF")
 			self.__DayMode_Update("light")
-			self.enableXMasBoom = False
+			self.cueTimeline.Stop("xmas_boom")
 
 	def __XMasTree_Enable(self, grade):
 
-		print "XMAS_TREE ", grade
+		traceLog.Info("xmas", "XMAS_TREE %s", grade)
 		background.SetXMasTree(int(grade))
 
 	def __XMasSong_Enable(self, mode):
 		if "1"==mode:
-			print "XMAS_SONG ON"
+			traceLog.Info("xmas", "XMAS_SONG ON")
 
 			XMAS_BGM = "xmas.mp3"
 
@@ -2038,7 +2259,7 @@ class GameWindow(ui.ScriptWindow):
 				snd.FadeInMusic("BGM/" + musicInfo.fieldMusic)
 
 		else:
-			print "XMAS_SONG OFF"
+			traceLog.Info("xmas", "XMAS_SONG OFF")
 
 			if musicInfo.fieldMusic != "":
 				snd.FadeOutMusic("BGM/" + musicInfo.fieldMusic)
@@ -2097,21 +2318,18 @@ class GameWindow(ui.ScriptWindow):
 		self.curtain.FadeIn()
 
 	## XMasBoom
-	def __XMasBoom_Update(self):
-
-		self.BOOM_DATA_LIST = ( (2, 5), (5, 2), (7, 3), (10, 3), (20, 5) )
-		if self.indexXMasBoom >= len(self.BOOM_DATA_LIST):
-			return
-
-		boomTime = self.BOOM_DATA_LIST[self.indexXMasBoom][0]
-		boomCount = self.BOOM_DATA_LIST[self.indexXMasBoom][1]
-
-		if app.GetTime() - self.startTimeXMasBoom > boomTime:
+	# (time, boom count)
+	XMAS_BOOM_DATA_LIST = ( (2, 5), (5, 2), (7, 3), (10, 3), (20, 5) )
 
-			self.indexXMasBoom += 1
+	def __XMasBoom_Start(self):
+		# the cues must not keep the GameWindow alive
+		boomManyFunc = ui.__mem_func__(self.__XMasBoom_BoomMany)
+		cueList = [ (boomTime, lambda boomCount=boomCount: boomManyFunc(boomCount)) for (boomTime, boomCount) in self.XMAS_BOOM_DATA_LIST ]
+		self.cueTimeline.Start("xmas_boom", cueList)
 
-			for i in xrange(boomCount):
-				self.__XMasBoom_Boom()
+	def __XMasBoom_BoomMany(self, boomCount):
+		for i in xrange(boomCount):
+			self.__XMasBoom_Boom()
 
 	def __XMasBoom_Boom(self):
 		x, y, z = player.GetMainCharacterPosition()
@@ -2139,9 +2357,9 @@ class GameWindow(ui.ScriptWindow):
 		vid = self.partyRequestQuestionDialog.vid
 
 		if answer:
-			net.SendChatPacket("/party_request_accept " + str(vid))
+			commandQueue.Send("/party_request_accept " + str(vid))
 		else:
-			net.SendChatPacket("/party_request_deny " + str(vid))
+			commandQueue.Send("/party_request_deny " + str(vid))
 
 		self.partyRequestQuestionDialog.Close()
 		self.partyRequestQuestionDialog = None
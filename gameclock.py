@@ -0,0 +1,102 @@
+##
+## Game Clock
+##
+## GameWindow.OnUpdate calls Tick once per frame, which samples the three
+## engine time bases in one go. Everything running in that frame reads the
+## same times from here instead of asking the engine again:
+##
+##   GetGlobalTime      - app.GetGlobalTime, milliseconds
+##   GetGlobalTimeStamp - app.GetGlobalTimeStamp, server time in seconds
+##   GetTime            - app.GetTime, client seconds (float)
+##
+## Outside of ticking (before the first Tick, after Reset) the times are read
+## live. SetSource swaps the engine for any object with the same three
+## methods, e.g. ScaledClock to play a recorded session back faster.
+##
+import app
+
+class EngineClock(object):
+	def GetGlobalTime(self):
+		return app.GetGlobalTime()
+
+	def GetGlobalTimeStamp(self):
+		return app.GetGlobalTimeStamp()
+
+	def GetTime(self):
+		return app.GetTime()
+
+## Runs timeScale times as fast as the clock it is based on, from the moment it is made.
+class ScaledClock(object):
+	def __init__(self, timeScale, baseClock = None):
+		if None == baseClock:
+			baseClock = EngineClock()
+
+		self.baseClock = baseClock
+		self.timeScale = timeScale
+
+		self.startGlobalTime = baseClock.GetGlobalTime()
+		self.startGlobalTimeStamp = baseClock.GetGlobalTimeStamp()
+		self.startTime = baseClock.GetTime()
+
+	def __GetElapsedTime(self):
+		return (self.baseClock.GetTime() - self.startTime) * self.timeScale
+
+	def GetGlobalTime(self):
+		return self.startGlobalTime + int(self.__GetElapsedTime() * 1000.0)
+
+	def GetGlobalTimeStamp(self):
+		return self.startGlobalTimeStamp + int(self.__GetElapsedTime())
+
+	def GetTime(self):
+		return self.startTime + self.__GetElapsedTime()
+
+clockSource = EngineClock()
+
+isTicking = False
+globalTime = 0
+globalTimeStamp = 0
+time = 0.0
+
+def SetSource(source):
+	global clockSource
+
+	if None == source:
+		source = EngineClock()
+
+	clockSource = source
+
+	if isTicking:
+		Tick()
+
+def GetSource():
+	return clockSource
+
+def Tick():
+	global isTicking, globalTime, globalTimeStamp, time
+
+	isTicking = True
+	globalTime = clockSource.GetGlobalTime()
+	globalTimeStamp = clockSource.GetGlobalTimeStamp()
+	time = clockSource.GetTime()
+
+def Reset():
+	global isTicking
+	isTicking = False
+
+def GetGlobalTime():
+	if isTicking:
+		return globalTime
+
+	return clockSource.GetGlobalTime()
+
+def GetGlobalTimeStamp():
+	if isTicking:
+		return globalTimeStamp
+
+	return clockSource.GetGlobalTimeStamp()
+
+def GetTime():
+	if isTicking:
+		return time
+
+	return clockSource.GetTime()
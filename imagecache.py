@@ -0,0 +1,137 @@
+##
+## Image Cache
+##
+## Shared image loads for icons that come and go (affects, quest buttons,
+## quick page numbers). Every loaded path keeps a hidden keeper image so the
+## texture stays loaded after the last window showing it is gone. Keepers
+## are counted per window using them (a button counts its up, over and down
+## images), and once more than MAX_KEEP_COUNT
+## unused ones are kept the least recently used one is dropped.
+## Paths that failed to load are remembered and fail at once afterwards
+## instead of going through the loader and an exception again. Clear is
+## called when the Interface is destroyed.
+##
+import ui
+from collections import OrderedDict
+
+MAX_KEEP_COUNT = 64
+
+# key -> keeper image, least recently used first
+keeperDict = OrderedDict()
+# key -> number of windows showing it
+refCountDict = {}
+failedKeySet = set()
+
+loadCount = 0
+hitCount = 0
+failCount = 0
+
+## Pack paths are case insensitive and may use either slash
+def NormalizePath(path):
+	return path.replace("\\", "/").lower()
+
+def IsFailed(path):
+	return NormalizePath(path) in failedKeySet
+
+def __Keep(key, path):
+	global loadCount, hitCount
+
+	keeper = keeperDict.pop(key, None)
+	if keeper:
+		hitCount += 1
+		keeperDict[key] = keeper
+		return True
+
+	keeper = ui.ImageBox()
+	try:
+		keeper.LoadImage(path)
+	except:
+		failedKeySet.add(key)
+		return False
+
+	loadCount += 1
+	keeperDict[key] = keeper
+	__Evict()
+	return True
+
+def __Evict():
+	unusedCount = len(keeperDict) - len(refCountDict)
+	if unusedCount <= MAX_KEEP_COUNT:
+		return
+
+	for key in keeperDict.keys():
+		if refCountDict.has_key(key):
+			continue
+
+		del keeperDict[key]
+		unusedCount -= 1
+		if unusedCount <= MAX_KEEP_COUNT:
+			break
+
+def __AddRef(window, keyList):
+	Release(window)
+
+	for key in keyList:
+		refCountDict[key] = refCountDict.get(key, 0) + 1
+	window.imageCacheKeyList = keyList
+
+## Lets go of the images a window was showing, call it before dropping the window
+def Release(window):
+	keyList = getattr(window, "imageCacheKeyList", None)
+	if not keyList:
+		return
+
+	window.imageCacheKeyList = None
+
+	for key in keyList:
+		refCount = refCountDict.get(key, 0) - 1
+		if refCount > 0:
+			refCountDict[key] = refCount
+		else:
+			refCountDict.pop(key, None)
+
+	__Evict()
+
+## window.LoadImage(path) through the cache, returns False when the path can't be loaded
+def LoadImage(window, path):
+	global failCount
+
+	key = NormalizePath(path)
+	if key in failedKeySet or not __Keep(key, path):
+		failCount += 1
+		return False
+
+	try:
+		window.LoadImage(path)
+	except:
+		failedKeySet.add(key)
+		failCount += 1
+		return False
+
+	__AddRef(window, (key,))
+	return True
+
+## button.SetUp/Over/DownVisual through the cache, nothing is changed when one of them can't be loaded
+def SetButtonVisual(button, upPath, overPath, downPath):
+	global failCount
+
+	for path in (upPath, overPath, downPath):
+		key = NormalizePath(path)
+		if key in failedKeySet or not __Keep(key, path):
+			failCount += 1
+			return False
+
+	button.SetUpVisual(upPath)
+	button.SetOverVisual(overPath)
+	button.SetDownVisual(downPath)
+
+	__AddRef(button, (NormalizePath(upPath), NormalizePath(overPath), NormalizePath(downPath)))
+	return True
+
+def Clear():
+	keeperDict.clear()
+	refCountDict.clear()
+	failedKeySet.clear()
+
+def GetStatistics():
+	return (loadCount, hitCount, failCount, len(keeperDict), len(failedKeySet))
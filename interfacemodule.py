@@ -17,9 +17,14 @@ import uiDragonSoul
 import uiChat
 import uiMessenger
 import guild
+import lazyModule
+import traceLog
+import objectPool
+import uiButtonDock
+import imageCache
 
 import ui
-import uiHelp
+uiHelp = lazyModule.LazyModule("uiHelp")
 import uiWhisper
 import uiPointReset
 import uiShop
@@ -31,17 +36,17 @@ import uiMiniMap
 import uiParty
 import uiSafebox
 import uiGuild
-import uiQuest
+uiQuest = lazyModule.LazyModule("uiQuest")
 import uiPrivateShopBuilder
 import uiCommon
 import uiRefine
-import uiEquipmentDialog
+uiEquipmentDialog = lazyModule.LazyModule("uiEquipmentDialog")
 import uiGameButton
 import uiTip
-import uiCube
-import miniMap
+uiCube = lazyModule.LazyModule("uiCube")
+miniMap = lazyModule.LazyModule("miniMap")
 # ACCESSORY_REFINE_ADD_METIN_STONE
-import uiSelectItem
+uiSelectItem = lazyModule.LazyModule("uiSelectItem")
 # END_OF_ACCESSORY_REFINE_ADD_METIN_STONE
 import uiScriptLocale
 
@@ -49,15 +54,55 @@ import event
 import localeInfo
 
 if app.ENABLE_ACCE_COSTUME_SYSTEM:
-	import uiacce
+	uiacce = lazyModule.LazyModule("uiacce")
 
 if app.ENABLE_MOVE_CHANNEL:
-	import uiMoveChannel
+	uiMoveChannel = lazyModule.LazyModule("uiMoveChannel")
 
 if app.ENABLE_WON_EXCHANGE_WINDOW:
-	import uiWonExchange
+	uiWonExchange = lazyModule.LazyModule("uiWonExchange")
 
 IsQBHide = 0
+
+# WHISPER_POOL
+WHISPER_DIALOG_POOL_SIZE = 5
+WHISPER_BUTTON_POOL_SIZE = 10
+WHISPER_POOL_PREWARM_COUNT = 2
+# END_OF_WHISPER_POOL
+
+# BUTTON_DOCK
+QUEST_BUTTON_COLUMN_COUNT = 3
+WHISPER_BUTTON_COLUMN_COUNT = 2
+# END_OF_BUTTON_DOCK
+
+# LAZY_WINDOW
+## Interface attribute that makes its window on first access with the given make function.
+## Deleting the attribute leaves None behind, so a closed Interface never makes it again.
+class LazyWindow(object):
+	def __init__(self, name, makeFunc):
+		self.name = name
+		self.makeFunc = makeFunc
+
+	def __get__(self, obj, objType = None):
+		if None == obj:
+			return self
+
+		if not obj.__dict__.has_key(self.name):
+			self.makeFunc(obj)
+			obj.__dict__.setdefault(self.name, None)
+
+		return obj.__dict__[self.name]
+
+	def __set__(self, obj, value):
+		obj.__dict__[self.name] = value
+
+	def __delete__(self, obj):
+		obj.__dict__[self.name] = None
+
+	def IsBuilt(self, obj):
+		return None != obj.__dict__.get(self.name)
+# END_OF_LAZY_WINDOW
+
 class Interface(object):
 	CHARACTER_STATUS_TAB = 1
 	CHARACTER_SKILL_TAB = 2
@@ -74,7 +119,6 @@ class Interface(object):
 		self.mallPageDlg = None
 		# END_OF_ITEM_MALL
 
-		self.wndWeb = None
 		self.wndTaskBar = None
 		self.wndCharacter = None
 		self.wndInventory = None
@@ -97,6 +141,7 @@ class Interface(object):
 			self.wndMoveChannel = None
 		if app.ENABLE_WON_EXCHANGE_WINDOW:
 			self.wndWonExchange = None
+
 		event.SetInterfaceWindow(self)
 
 	def __del__(self):
@@ -195,11 +240,6 @@ class Interface(object):
 		wndMiniMap = uiMiniMap.MiniMap()
 		wndSafebox = uiSafebox.SafeboxWindow()
 
-		# ITEM_MALL
-		wndMall = uiSafebox.MallWindow()
-		self.wndMall = wndMall
-		# END_OF_ITEM_MALL
-
 		wndChatLog = uiChat.ChatLogWindow()
 		wndChatLog.BindInterface(self)
 
@@ -265,6 +305,12 @@ class Interface(object):
 		self.dlgRefineNew = uiRefine.RefineDialogNew()
 		self.dlgRefineNew.Hide()
 
+	# ITEM_MALL
+	def __MakeMallWindow(self):
+		self.wndMall = uiSafebox.MallWindow()
+		self.wndMall.SetItemToolTip(self.tooltipItem)
+	# END_OF_ITEM_MALL
+
 	def __MakeHelpWindow(self):
 		self.wndHelp = uiHelp.HelpWindow()
 		self.wndHelp.LoadDialog()
@@ -288,11 +334,13 @@ class Interface(object):
 	def __MakeCubeWindow(self):
 		self.wndCube = uiCube.CubeWindow()
 		self.wndCube.LoadWindow()
+		self.wndCube.SetItemToolTip(self.tooltipItem)
 		self.wndCube.Hide()
 
 	def __MakeCubeResultWindow(self):
 		self.wndCubeResult = uiCube.CubeResultWindow()
 		self.wndCubeResult.LoadWindow()
+		self.wndCubeResult.SetItemToolTip(self.tooltipItem)
 		self.wndCubeResult.Hide()
 
 	if app.ENABLE_ACCE_COSTUME_SYSTEM:
@@ -311,9 +359,30 @@ class Interface(object):
 	# ACCESSORY_REFINE_ADD_METIN_STONE
 	def __MakeItemSelectWindow(self):
 		self.wndItemSelect = uiSelectItem.SelectItemWindow()
+		self.wndItemSelect.SetItemToolTip(self.tooltipItem)
 		self.wndItemSelect.Hide()
 	# END_OF_ACCESSORY_REFINE_ADD_METIN_STONE
 
+	# LAZY_WINDOW
+	## Rarely used windows, made on first access
+	wndMall = LazyWindow("wndMall", __MakeMallWindow)
+	wndHelp = LazyWindow("wndHelp", __MakeHelpWindow)
+	wndWeb = LazyWindow("wndWeb", __MakeWebWindow)
+	wndCube = LazyWindow("wndCube", __MakeCubeWindow)
+	wndCubeResult = LazyWindow("wndCubeResult", __MakeCubeResultWindow)
+	wndItemSelect = LazyWindow("wndItemSelect", __MakeItemSelectWindow)
+
+	def IsWindowBuilt(self, windowName):
+		lazyWindow = getattr(self.__class__, windowName, None)
+		if isinstance(lazyWindow, LazyWindow):
+			return lazyWindow.IsBuilt(self)
+
+		return None != getattr(self, windowName, None)
+
+	def GetBuiltLazyWindowNameList(self):
+		return [name for name, value in self.__class__.__dict__.items() if isinstance(value, LazyWindow) and value.IsBuilt(self)]
+	# END_OF_LAZY_WINDOW
+
 	def MakeInterface(self):
 		self.__MakeMessengerWindow()
 		self.__MakeGuildWindow()
@@ -325,48 +394,43 @@ class Interface(object):
 		self.__MakeUICurtain()
 		self.__MakeTaskBar()
 		self.__MakeGameButtonWindow()
-		self.__MakeHelpWindow()
 		self.__MakeTipBoard()
-		self.__MakeWebWindow()
-		self.__MakeCubeWindow()
-		self.__MakeCubeResultWindow()
+		# acce windows stay eager, the inventory keeps them from SetAcceWindow on
 		if app.ENABLE_ACCE_COSTUME_SYSTEM:
 			self.__MakeAcceWindow()
 
-		# ACCESSORY_REFINE_ADD_METIN_STONE
-		self.__MakeItemSelectWindow()
-		# END_OF_ACCESSORY_REFINE_ADD_METIN_STONE
-
-		self.questButtonList = []
-		self.whisperButtonList = []
 		self.whisperDialogDict = {}
 		self.privateShopAdvertisementBoardDict = {}
 
+		# WHISPER_POOL
+		self.whisperDialogPool = objectPool.ObjectPool(ui.__mem_func__(self.__CreateWhisperDialog), ui.__mem_func__(self.__ResetWhisperDialog), ui.__mem_func__(self.__DestroyWhisperDialog), WHISPER_DIALOG_POOL_SIZE)
+		self.whisperButtonPool = objectPool.ObjectPool(ui.__mem_func__(self.__CreateWhisperButton), ui.__mem_func__(self.__ResetWhisperButton), None, WHISPER_BUTTON_POOL_SIZE)
+		self.whisperDialogPool.Prewarm(WHISPER_POOL_PREWARM_COUNT)
+		self.whisperButtonPool.Prewarm(WHISPER_POOL_PREWARM_COUNT)
+		# END_OF_WHISPER_POOL
+
+		# BUTTON_DOCK
+		self.questButtonDock = uiButtonDock.ButtonDock(ui.__mem_func__(self.__CreateQuestButton), ui.__mem_func__(self.__BindQuestButton), ui.__mem_func__(self.__ReleaseQuestButton))
+		self.whisperButtonDock = uiButtonDock.ButtonDock(self.whisperButtonPool.Acquire, ui.__mem_func__(self.__BindWhisperButton), self.whisperButtonPool.Release)
+		self.__ArrangeQuestButton()
+		self.__ArrangeWhisperButton()
+		# END_OF_BUTTON_DOCK
+
 		self.wndInventory.SetItemToolTip(self.tooltipItem)
 		if app.ENABLE_DRAGON_SOUL_SYSTEM:
 			self.wndDragonSoul.SetItemToolTip(self.tooltipItem)
 			self.wndDragonSoulRefine.SetItemToolTip(self.tooltipItem)
 		self.wndSafebox.SetItemToolTip(self.tooltipItem)
-		self.wndCube.SetItemToolTip(self.tooltipItem)
-		self.wndCubeResult.SetItemToolTip(self.tooltipItem)
 
 		if app.ENABLE_ACCE_COSTUME_SYSTEM:
 			self.wndAcceCombine.SetItemToolTip(self.tooltipItem)
 			self.wndAcceAbsorption.SetItemToolTip(self.tooltipItem)
 
-		# ITEM_MALL
-		self.wndMall.SetItemToolTip(self.tooltipItem)
-		# END_OF_ITEM_MALL
-
 		self.wndCharacter.SetSkillToolTip(self.tooltipSkill)
 		self.wndTaskBar.SetItemToolTip(self.tooltipItem)
 		self.wndTaskBar.SetSkillToolTip(self.tooltipSkill)
 		self.wndGuild.SetSkillToolTip(self.tooltipSkill)
 
-		# ACCESSORY_REFINE_ADD_METIN_STONE
-		self.wndItemSelect.SetItemToolTip(self.tooltipItem)
-		# END_OF_ACCESSORY_REFINE_ADD_METIN_STONE
-
 		self.dlgShop.SetItemToolTip(self.tooltipItem)
 		self.dlgExchange.SetItemToolTip(self.tooltipItem)
 		self.privateShopBuilder.SetItemToolTip(self.tooltipItem)
@@ -384,12 +448,8 @@ class Interface(object):
 	## Make Windows & Dialogs
 	################################
 
-	def Close(self):
-		if self.dlgWhisperWithoutTarget:
-			self.dlgWhisperWithoutTarget.Destroy()
-			del self.dlgWhisperWithoutTarget
-
-		if uiQuest.QuestDialog.__dict__.has_key("QuestCurtain"):
+	def __CloseQuestWindows(self):
+		if lazyModule.IsLoaded(uiQuest) and uiQuest.QuestDialog.__dict__.has_key("QuestCurtain"):
 			uiQuest.QuestDialog.QuestCurtain.Close()
 			del uiQuest.QuestDialog.QuestCurtain #@fixme016 it's recreated only if it's deleted from scope
 
@@ -400,6 +460,15 @@ class Interface(object):
 				eachQuestWindow = None
 		self.wndQuestWindow = {}
 
+	def Close(self):
+		traceLog.Info("interface", "Interface lazy windows built: %s", self.GetBuiltLazyWindowNameList())
+
+		if self.dlgWhisperWithoutTarget:
+			self.dlgWhisperWithoutTarget.Destroy()
+			del self.dlgWhisperWithoutTarget
+
+		self.__CloseQuestWindows()
+
 		if self.wndChat:
 			self.wndChat.Destroy()
 
@@ -448,20 +517,20 @@ class Interface(object):
 		if self.wndSafebox:
 			self.wndSafebox.Destroy()
 
-		if self.wndWeb:
+		if self.IsWindowBuilt("wndWeb"):
 			self.wndWeb.Destroy()
 			self.wndWeb = None
 
-		if self.wndMall:
+		if self.IsWindowBuilt("wndMall"):
 			self.wndMall.Destroy()
 
 		if self.wndParty:
 			self.wndParty.Destroy()
 
-		if self.wndHelp:
+		if self.IsWindowBuilt("wndHelp"):
 			self.wndHelp.Destroy()
 
-		if self.wndCube:
+		if self.IsWindowBuilt("wndCube"):
 			self.wndCube.Destroy()
 
 		if app.ENABLE_ACCE_COSTUME_SYSTEM and self.wndAcceCombine:
@@ -478,7 +547,7 @@ class Interface(object):
 			self.wndWonExchange.Destroy()
 			self.wndWonExchange = None
 
-		if self.wndCubeResult:
+		if self.IsWindowBuilt("wndCubeResult"):
 			self.wndCubeResult.Destroy()
 
 		if self.wndMessenger:
@@ -505,17 +574,17 @@ class Interface(object):
 		# END_OF_ITEM_MALL
 
 		# ACCESSORY_REFINE_ADD_METIN_STONE
-		if self.wndItemSelect:
+		if self.IsWindowBuilt("wndItemSelect"):
 			self.wndItemSelect.Destroy()
 		# END_OF_ACCESSORY_REFINE_ADD_METIN_STONE
 
 		self.wndChatLog.Destroy()
-		for btn in self.questButtonList:
-			btn.SetEvent(0)
-		for btn in self.whisperButtonList:
-			btn.SetEvent(0)
+		self.questButtonDock.Destroy()
+		self.whisperButtonDock.Destroy()
 		for dlg in self.whisperDialogDict.itervalues():
 			dlg.Destroy()
+		self.whisperDialogPool.Clear()
+		self.whisperButtonPool.Clear()
 		for brd in self.guildScoreBoardDict.itervalues():
 			brd.Destroy()
 		for dlg in self.equipmentDialogDict.itervalues():
@@ -569,8 +638,6 @@ class Interface(object):
 			del self.wndAcceCombine
 			del self.wndAcceAbsorption
 
-		self.questButtonList = []
-		self.whisperButtonList = []
 		self.whisperDialogDict = {}
 		self.privateShopAdvertisementBoardDict = {}
 		self.guildScoreBoardDict = {}
@@ -578,6 +645,9 @@ class Interface(object):
 
 		uiChat.DestroyChatInputSetWindow()
 
+		# nothing shows the cached images any more
+		imageCache.Clear()
+
 	## Skill
 	def OnUseSkill(self, slotIndex, coolTime):
 		self.wndCharacter.OnUseSkill(slotIndex, coolTime)
@@ -603,30 +673,32 @@ class Interface(object):
 		self.wndCharacter.RefreshAlignment()
 
 	def RefreshStatus(self):
-		self.wndTaskBar.RefreshStatus()
 		self.wndCharacter.RefreshStatus()
 		self.wndInventory.RefreshStatus()
-		if self.wndEnergyBar:
-			self.wndEnergyBar.RefreshStatus()
 		if app.ENABLE_DRAGON_SOUL_SYSTEM:
 			self.wndDragonSoul.RefreshStatus()
 
 	def RefreshStamina(self):
 		self.wndTaskBar.RefreshStamina()
 
+	def RefreshQuickPage(self):
+		self.wndTaskBar.RefreshQuickPage()
+
 	def RefreshSkill(self):
+		self.CheckGameButton()
 		self.wndCharacter.RefreshSkill()
 		self.wndTaskBar.RefreshSkill()
+		self.wndTaskBar.RefreshQuickSlotType(player.SLOT_TYPE_SKILL)
 
 	def RefreshInventory(self):
-		self.wndTaskBar.RefreshQuickSlot()
+		self.wndTaskBar.RefreshQuickSlotType(player.SLOT_TYPE_INVENTORY)
 		self.wndInventory.RefreshItemSlot()
 		if app.ENABLE_DRAGON_SOUL_SYSTEM:
 			self.wndDragonSoul.RefreshItemSlot()
 
 	def RefreshCharacter(self):
 		self.wndCharacter.RefreshCharacter()
-		self.wndTaskBar.RefreshQuickSlot()
+		self.wndTaskBar.RefreshQuickSlotType(player.SLOT_TYPE_SKILL)
 
 	def RefreshQuest(self):
 		self.wndCharacter.RefreshQuest()
@@ -662,6 +734,8 @@ class Interface(object):
 
 	def RefreshGuildSkillPage(self):
 		self.wndGuild.RefreshGuildSkillPage()
+		# guild skill levels are shown on the quick slots
+		self.wndTaskBar.RefreshQuickSlotType(player.SLOT_TYPE_SKILL)
 
 	def RefreshGuildGradePage(self):
 		self.wndGuild.RefreshGuildGradePage()
@@ -931,7 +1005,7 @@ class Interface(object):
 		if True == self.wndChat.IsEditMode():
 			self.wndChat.CloseChat()
 		else:
-			if self.wndWeb and self.wndWeb.IsShow():
+			if self.IsWindowBuilt("wndWeb") and self.wndWeb.IsShow():
 				pass
 			else:
 				self.wndChat.OpenChat()
@@ -1162,7 +1236,8 @@ class Interface(object):
 		self.wndTaskBar.ShowGift()
 
 	def CloseWbWindow(self):
-		self.wndWeb.Close()
+		if self.IsWindowBuilt("wndWeb"):
+			self.wndWeb.Close()
 
 	def OpenCubeWindow(self):
 		self.wndCube.Open()
@@ -1374,9 +1449,7 @@ class Interface(object):
 	#####################################################################################
 	### Quest ###
 	def BINARY_ClearQuest(self, index):
-		btn = self.__FindQuestButton(index)
-		if 0 != btn:
-			self.__DestroyQuestButton(btn)
+		self.questButtonDock.Remove(index)
 
 	def RecvQuest(self, index, name):
 		# QUEST_LETTER_IMAGE
@@ -1384,12 +1457,22 @@ class Interface(object):
 		# END_OF_QUEST_LETTER_IMAGE
 
 	def BINARY_RecvQuest(self, index, name, iconType, iconName):
+		self.questButtonDock.Add(index, (name, iconType, iconName))
+		self.__ArrangeQuestButton()
+
+	def __CreateQuestButton(self):
+		return uiWhisper.WhisperButton()
+
+	def __ReleaseQuestButton(self, btn):
+		btn.SetEvent(0)
+		btn.DisableFlash()
+		imageCache.Release(btn)
 
-		btn = self.__FindQuestButton(index)
-		if 0 != btn:
-			self.__DestroyQuestButton(btn)
+	def __BindQuestButton(self, btn, index, questData):
+		(name, iconType, iconName) = questData
 
-		btn = uiWhisper.WhisperButton()
+		# the button may come from another entry
+		btn.DisableFlash()
 
 		# QUEST_LETTER_IMAGE
 		import item
@@ -1400,18 +1483,15 @@ class Interface(object):
 			buttonImageFileName=iconName
 
 		if iconName and (iconType not in ("item", "file")): # type "ex" implied
-			btn.SetUpVisual("d:/ymir work/ui/game/quest/questicon/%s" % (iconName.replace("open", "close")))
-			btn.SetOverVisual("d:/ymir work/ui/game/quest/questicon/%s" % (iconName))
-			btn.SetDownVisual("d:/ymir work/ui/game/quest/questicon/%s" % (iconName))
+			imageCache.SetButtonVisual(btn,
+				"d:/ymir work/ui/game/quest/questicon/%s" % (iconName.replace("open", "close")),
+				"d:/ymir work/ui/game/quest/questicon/%s" % (iconName),
+				"d:/ymir work/ui/game/quest/questicon/%s" % (iconName))
 		else:
 			if localeInfo.IsEUROPE():
-				btn.SetUpVisual(localeInfo.GetLetterCloseImageName())
-				btn.SetOverVisual(localeInfo.GetLetterOpenImageName())
-				btn.SetDownVisual(localeInfo.GetLetterOpenImageName())
+				imageCache.SetButtonVisual(btn, localeInfo.GetLetterCloseImageName(), localeInfo.GetLetterOpenImageName(), localeInfo.GetLetterOpenImageName())
 			else:
-				btn.SetUpVisual(buttonImageFileName)
-				btn.SetOverVisual(buttonImageFileName)
-				btn.SetDownVisual(buttonImageFileName)
+				imageCache.SetButtonVisual(btn, buttonImageFileName, buttonImageFileName, buttonImageFileName)
 				btn.Flash()
 		# END_OF_QUEST_LETTER_IMAGE
 
@@ -1426,6 +1506,7 @@ class Interface(object):
 		if "blink" in listOfTypes:
 			btn.Flash()
 
+		btn.ToolTipText.SetPackedFontColor(0xffffffff)
 		listOfColors = {
 			"golden":	0xFFffa200,
 			"green":	0xFF00e600,
@@ -1439,15 +1520,11 @@ class Interface(object):
 			if k in listOfTypes:
 				btn.ToolTipText.SetPackedFontColor(v)
 
-		btn.SetEvent(ui.__mem_func__(self.__StartQuest), btn)
-		btn.Show()
+		btn.SetEvent(ui.__mem_func__(self.__StartQuest), index)
 
 		btn.index = index
 		btn.name = name
 
-		self.questButtonList.insert(0, btn)
-		self.__ArrangeQuestButton()
-
 	def __ArrangeQuestButton(self):
 
 		screenWidth = wndMgr.GetScreenWidth()
@@ -1464,40 +1541,23 @@ class Interface(object):
 		yPos = 170 * screenHeight / 600
 		yCount = (screenHeight - 330) / 63
 
-		count = 0
-		for btn in self.questButtonList:
-
-			btn.SetPosition(xPos + (int(count/yCount) * 100), yPos + (count%yCount * 63))
-			count += 1
-			global IsQBHide
-			if IsQBHide:
-				btn.Hide()
-			else:
-				btn.Show()
+		self.questButtonDock.SetLayout(xPos, yPos, 100, 63, yCount, QUEST_BUTTON_COLUMN_COUNT)
 
-	def __StartQuest(self, btn):
-		event.QuestButtonClick(btn.index)
-		self.__DestroyQuestButton(btn)
-
-	def __FindQuestButton(self, index):
-		for btn in self.questButtonList:
-			if btn.index == index:
-				return btn
-
-		return 0
+		global IsQBHide
+		if IsQBHide:
+			self.questButtonDock.Hide()
+		else:
+			self.questButtonDock.Show()
 
-	def __DestroyQuestButton(self, btn):
-		btn.SetEvent(0)
-		self.questButtonList.remove(btn)
-		self.__ArrangeQuestButton()
+	def __StartQuest(self, index):
+		event.QuestButtonClick(index)
+		self.questButtonDock.Remove(index)
 
 	def HideAllQuestButton(self):
-		for btn in self.questButtonList:
-			btn.Hide()
+		self.questButtonDock.Hide()
 
 	def ShowAllQuestButton(self):
-		for btn in self.questButtonList:
-			btn.Show()
+		self.questButtonDock.Show()
 	#####################################################################################
 
 	#####################################################################################
@@ -1508,9 +1568,7 @@ class Interface(object):
 
 	def OpenWhisperDialogWithoutTarget(self):
 		if not self.dlgWhisperWithoutTarget:
-			dlgWhisper = uiWhisper.WhisperDialog(self.MinimizeWhisperDialog, self.CloseWhisperDialog)
-			dlgWhisper.BindInterface(self)
-			dlgWhisper.LoadDialog()
+			dlgWhisper = self.whisperDialogPool.Acquire()
 			dlgWhisper.OpenWithoutTarget(self.RegisterTemporaryWhisperDialog)
 			dlgWhisper.SetPosition(self.windowOpenPosition*30,self.windowOpenPosition*30)
 			dlgWhisper.Show()
@@ -1526,13 +1584,12 @@ class Interface(object):
 		if not self.dlgWhisperWithoutTarget:
 			return
 
-		btn = self.__FindWhisperButton(name)
-		if 0 != btn:
-			self.__DestroyWhisperButton(btn)
+		if self.whisperButtonDock.Has(name):
+			self.__DestroyWhisperButton(name)
 
 		elif self.whisperDialogDict.has_key(name):
 			oldDialog = self.whisperDialogDict[name]
-			oldDialog.Destroy()
+			self.whisperDialogPool.Release(oldDialog)
 			del self.whisperDialogDict[name]
 
 		self.whisperDialogDict[name] = self.dlgWhisperWithoutTarget
@@ -1548,40 +1605,39 @@ class Interface(object):
 			dlg.Show()
 
 			self.__CheckGameMaster(name)
-			btn = self.__FindWhisperButton(name)
-			if 0 != btn:
-				self.__DestroyWhisperButton(btn)
+			self.__DestroyWhisperButton(name)
 
 	def RecvWhisper(self, name):
 		if not self.whisperDialogDict.has_key(name):
-			btn = self.__FindWhisperButton(name)
-			if 0 == btn:
-				btn = self.__MakeWhisperButton(name)
-				btn.Flash()
+			if not self.whisperButtonDock.Has(name):
+				self.__MakeWhisperButton(name)
+				self.__FlashWhisperButton(name)
 
 				chat.AppendChat(chat.CHAT_TYPE_NOTICE, localeInfo.RECEIVE_MESSAGE % (name))
 
 			else:
-				btn.Flash()
+				self.__FlashWhisperButton(name)
 		elif self.IsGameMasterName(name):
 			dlg = self.whisperDialogDict[name]
-			dlg.SetGameMasterLook()
+			self.__SetWhisperDialogGameMasterLook(dlg)
 
 	def MakeWhisperButton(self, name):
 		self.__MakeWhisperButton(name)
 
 	def ShowWhisperDialog(self, btn):
+		name = btn.name
+
 		try:
-			self.__MakeWhisperDialog(btn.name)
-			dlgWhisper = self.whisperDialogDict[btn.name]
-			dlgWhisper.OpenWithTarget(btn.name)
+			self.__MakeWhisperDialog(name)
+			dlgWhisper = self.whisperDialogDict[name]
+			dlgWhisper.OpenWithTarget(name)
 			dlgWhisper.Show()
-			self.__CheckGameMaster(btn.name)
+			self.__CheckGameMaster(name)
 		except:
 			import dbg
 			dbg.TraceError("interface.ShowWhisperDialog - Failed to find key")
 
-		self.__DestroyWhisperButton(btn)
+		self.__DestroyWhisperButton(name)
 
 	def MinimizeWhisperDialog(self, name):
 
@@ -1595,14 +1651,14 @@ class Interface(object):
 		if 0 == name:
 
 			if self.dlgWhisperWithoutTarget:
-				self.dlgWhisperWithoutTarget.Destroy()
+				self.whisperDialogPool.Release(self.dlgWhisperWithoutTarget)
 				self.dlgWhisperWithoutTarget = None
 
 			return
 
 		try:
 			dlgWhisper = self.whisperDialogDict[name]
-			dlgWhisper.Destroy()
+			self.whisperDialogPool.Release(dlgWhisper)
 			del self.whisperDialogDict[name]
 		except:
 			import dbg
@@ -1618,23 +1674,52 @@ class Interface(object):
 		yCount = (screenHeight - 330) / 63
 		#yCount = (screenHeight - 285) / 63
 
-		count = 0
-		for button in self.whisperButtonList:
+		self.whisperButtonDock.SetLayout(xPos, yPos, -50, 63, yCount, WHISPER_BUTTON_COLUMN_COUNT)
 
-			button.SetPosition(xPos + (int(count/yCount) * -50), yPos + (count%yCount * 63))
-			count += 1
+	# WHISPER_POOL
+	def __CreateWhisperDialog(self):
+		dlgWhisper = uiWhisper.WhisperDialog(self.MinimizeWhisperDialog, self.CloseWhisperDialog)
+		dlgWhisper.BindInterface(self)
+		dlgWhisper.LoadDialog()
+		dlgWhisper.Hide()
+		dlgWhisper.isGameMasterLook = False
+		return dlgWhisper
 
-	def __FindWhisperButton(self, name):
-		for button in self.whisperButtonList:
-			if button.name == name:
-				return button
+	def __ResetWhisperDialog(self, dlgWhisper):
+		# the game master look can not be taken back
+		if dlgWhisper.isGameMasterLook:
+			return False
 
-		return 0
+		dlgWhisper.chatLine.KillFocus()
+		dlgWhisper.chatLine.SetText("")
+		dlgWhisper.Hide()
+		return True
+
+	def __DestroyWhisperDialog(self, dlgWhisper):
+		dlgWhisper.Destroy()
+
+	def __SetWhisperDialogGameMasterLook(self, dlgWhisper):
+		dlgWhisper.SetGameMasterLook()
+		dlgWhisper.isGameMasterLook = True
+
+	def __CreateWhisperButton(self):
+		whisperButton = uiWhisper.WhisperButton()
+		whisperButton.SetUpVisual("d:/ymir work/ui/game/windows/btn_mail_up.sub")
+		whisperButton.SetOverVisual("d:/ymir work/ui/game/windows/btn_mail_up.sub")
+		whisperButton.SetDownVisual("d:/ymir work/ui/game/windows/btn_mail_up.sub")
+		whisperButton.Hide()
+		return whisperButton
+
+	def __ResetWhisperButton(self, whisperButton):
+		whisperButton.SetEvent(0)
+		whisperButton.DisableFlash()
+		whisperButton.Hide()
+		whisperButton.name = None
+		return True
+	# END_OF_WHISPER_POOL
 
 	def __MakeWhisperDialog(self, name):
-		dlgWhisper = uiWhisper.WhisperDialog(self.MinimizeWhisperDialog, self.CloseWhisperDialog)
-		dlgWhisper.BindInterface(self)
-		dlgWhisper.LoadDialog()
+		dlgWhisper = self.whisperDialogPool.Acquire()
 		dlgWhisper.SetPosition(self.windowOpenPosition*30,self.windowOpenPosition*30)
 		self.whisperDialogDict[name] = dlgWhisper
 
@@ -1643,43 +1728,50 @@ class Interface(object):
 		return dlgWhisper
 
 	def __MakeWhisperButton(self, name):
-		whisperButton = uiWhisper.WhisperButton()
-		whisperButton.SetUpVisual("d:/ymir work/ui/game/windows/btn_mail_up.sub")
-		whisperButton.SetOverVisual("d:/ymir work/ui/game/windows/btn_mail_up.sub")
-		whisperButton.SetDownVisual("d:/ymir work/ui/game/windows/btn_mail_up.sub")
+		# [isFlash]
+		self.whisperButtonDock.Add(name, [False])
+
+	def __BindWhisperButton(self, whisperButton, name, whisperData):
 		if self.IsGameMasterName(name):
 			whisperButton.SetToolTipTextWithColor(name, 0xffffa200)
 		else:
 			whisperButton.SetToolTipText(name)
+			whisperButton.ToolTipText.SetPackedFontColor(0xffffffff)
 		whisperButton.ToolTipText.SetHorizontalAlignCenter()
 		whisperButton.SetEvent(ui.__mem_func__(self.ShowWhisperDialog), whisperButton)
-		whisperButton.Show()
 		whisperButton.name = name
 
-		self.whisperButtonList.insert(0, whisperButton)
-		self.__ArrangeWhisperButton()
+		if whisperData[0]:
+			whisperButton.Flash()
+		else:
+			whisperButton.DisableFlash()
 
-		return whisperButton
+	def __FlashWhisperButton(self, name):
+		whisperData = self.whisperButtonDock.GetData(name)
+		if not whisperData:
+			return
 
-	def __DestroyWhisperButton(self, button):
-		button.SetEvent(0)
-		self.whisperButtonList.remove(button)
-		self.__ArrangeWhisperButton()
+		whisperData[0] = True
+
+		whisperButton = self.whisperButtonDock.GetButton(name)
+		if whisperButton:
+			whisperButton.Flash()
+
+	def __DestroyWhisperButton(self, name):
+		self.whisperButtonDock.Remove(name)
 
 	def HideAllWhisperButton(self):
-		for btn in self.whisperButtonList:
-			btn.Hide()
+		self.whisperButtonDock.Hide()
 
 	def ShowAllWhisperButton(self):
-		for btn in self.whisperButtonList:
-			btn.Show()
+		self.whisperButtonDock.Show()
 
 	def __CheckGameMaster(self, name):
 		if not self.listGMName.has_key(name):
 			return
 		if self.whisperDialogDict.has_key(name):
 			dlg = self.whisperDialogDict[name]
-			dlg.SetGameMasterLook()
+			self.__SetWhisperDialogGameMasterLook(dlg)
 
 	def RegisterGameMasterName(self, name):
 		if self.listGMName.has_key(name):
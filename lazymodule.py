@@ -0,0 +1,62 @@
+##
+## Lazy Module
+##
+## uiHelp = lazyModule.LazyModule("uiHelp") stands in for "import uiHelp".
+## The real module is imported when an attribute of it is used for the
+## first time, so modules a session never touches are never loaded.
+## Every import done through here is timed for the import report.
+##
+import time
+import traceLog
+
+# [ (moduleName, seconds), ... ] in import order
+importTimeList = []
+
+class LazyModule(object):
+	def __init__(self, name):
+		self.__dict__["_LazyModule__name"] = name
+		self.__dict__["_LazyModule__module"] = None
+
+	def __Load(self):
+		module = self.__module
+		if module:
+			return module
+
+		startTime = time.clock()
+		module = __import__(self.__name)
+		importTime = time.clock() - startTime
+		importTimeList.append((self.__name, importTime))
+
+		traceLog.Debug("import", "lazy import %s %.2f ms", self.__name, importTime * 1000.0)
+
+		self.__dict__["_LazyModule__module"] = module
+		return module
+
+	def __getattr__(self, attr):
+		return getattr(self.__Load(), attr)
+
+	def __setattr__(self, attr, value):
+		setattr(self.__Load(), attr, value)
+
+	def __repr__(self):
+		if self.__module:
+			return "<lazy module '%s' (loaded)>" % (self.__name)
+
+		return "<lazy module '%s'>" % (self.__name)
+
+def IsLoaded(module):
+	if isinstance(module, LazyModule):
+		return None != module.__dict__["_LazyModule__module"]
+
+	return True
+
+def GetImportReport():
+	return sorted(importTimeList, key = lambda x: -x[1])
+
+def LogImportReport():
+	totalTime = 0.0
+	for (moduleName, seconds) in GetImportReport():
+		traceLog.Info("import", "lazy import %-24s %8.2f ms", moduleName, seconds * 1000.0)
+		totalTime += seconds
+
+	traceLog.Info("import", "lazy import total %d modules %8.2f ms", len(importTimeList), totalTime * 1000.0)
@@ -0,0 +1,66 @@
+##
+## Object Pool
+##
+## Keeps released windows (or any object) for reuse instead of building
+## them again. Acquire hands out the most recently released object,
+## when more than maxCount objects are free the least recently released
+## one is destroyed.
+##
+
+class ObjectPool(object):
+
+	## createFunc() returns a new object
+	## resetFunc(obj) gets a released object ready for reuse, returning False destroys it instead
+	## destroyFunc(obj) destroys an object leaving the pool
+	def __init__(self, createFunc, resetFunc = None, destroyFunc = None, maxCount = 8):
+		self.createFunc = createFunc
+		self.resetFunc = resetFunc
+		self.destroyFunc = destroyFunc
+		self.maxCount = max(0, maxCount)
+
+		# least recently released first
+		self.freeList = []
+
+		self.createCount = 0
+		self.reuseCount = 0
+
+	def Acquire(self):
+		if self.freeList:
+			self.reuseCount += 1
+			return self.freeList.pop()
+
+		self.createCount += 1
+		return self.createFunc()
+
+	def Release(self, obj):
+		if self.resetFunc and False == self.resetFunc(obj):
+			self.__Destroy(obj)
+			return
+
+		self.freeList.append(obj)
+
+		while len(self.freeList) > self.maxCount:
+			self.__Destroy(self.freeList.pop(0))
+
+	def Prewarm(self, count):
+		count = min(count, self.maxCount)
+		while len(self.freeList) < count:
+			self.createCount += 1
+			self.freeList.append(self.createFunc())
+
+	def Clear(self):
+		freeList = self.freeList
+		self.freeList = []
+
+		for obj in freeList:
+			self.__Destroy(obj)
+
+	def GetFreeCount(self):
+		return len(self.freeList)
+
+	def GetStatistics(self):
+		return (self.createCount, self.reuseCount, len(self.freeList))
+
+	def __Destroy(self, obj):
+		if self.destroyFunc:
+			self.destroyFunc(obj)
@@ -0,0 +1,103 @@
+##
+## Player Status
+##
+## One snapshot of the player points the interface shows. The game marks it
+## invalid on every point change packet (RefreshStatus, RefreshStamina),
+## the next Get or Update fetches all points in one go and Update, called
+## once per frame, tells each subscriber once when one of its points has
+## changed. Windows read their points with Get instead of player.GetStatus.
+##
+import player
+
+POINT_LIST = (
+	player.LEVEL,
+	player.EXP,
+	player.NEXT_EXP,
+	player.HP,
+	player.MAX_HP,
+	player.HP_RECOVERY,
+	player.SP,
+	player.MAX_SP,
+	player.SP_RECOVERY,
+	player.STAMINA,
+	player.MAX_STAMINA,
+	player.STAT,
+	player.SKILL_ACTIVE,
+	player.ENERGY,
+	player.ENERGY_END_TIME,
+)
+
+# point type -> index in pointValueList
+POINT_INDEX_DICT = dict([(pointType, index) for (index, pointType) in enumerate(POINT_LIST)])
+
+pointValueList = [None] * len(POINT_LIST)
+isValid = False
+# indices changed since the last Update
+changedIndexSet = set()
+
+# handle -> (func, index set)
+subscriberDict = {}
+lastHandle = 0
+
+def Subscribe(func, pointTypeList):
+	global lastHandle
+
+	lastHandle += 1
+	subscriberDict[lastHandle] = (func, set([POINT_INDEX_DICT[pointType] for pointType in pointTypeList]))
+	return lastHandle
+
+def Unsubscribe(handle):
+	if subscriberDict.has_key(handle):
+		del subscriberDict[handle]
+
+def Invalidate():
+	global isValid
+	isValid = False
+
+## forgets the values of the last player, subscribers stay
+def Reset():
+	global pointValueList, isValid
+
+	pointValueList = [None] * len(POINT_LIST)
+	isValid = False
+	changedIndexSet.clear()
+
+def __Fetch():
+	global isValid
+
+	isValid = True
+
+	for index in xrange(len(POINT_LIST)):
+		value = player.GetStatus(POINT_LIST[index])
+		if value != pointValueList[index]:
+			pointValueList[index] = value
+			changedIndexSet.add(index)
+
+def Get(pointType):
+	index = POINT_INDEX_DICT.get(pointType)
+	if None == index:
+		return player.GetStatus(pointType)
+
+	if not isValid:
+		__Fetch()
+
+	return pointValueList[index]
+
+def Update():
+	if not isValid:
+		__Fetch()
+
+	if not changedIndexSet:
+		return
+
+	changedSet = changedIndexSet.copy()
+	changedIndexSet.clear()
+
+	for (handle, (func, indexSet)) in subscriberDict.items():
+		if changedSet.isdisjoint(indexSet):
+			continue
+
+		try:
+			func()
+		except ReferenceError:
+			Unsubscribe(handle)
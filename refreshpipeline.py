@@ -0,0 +1,81 @@
+##
+## Refresh Pipeline
+##
+## Network driven refreshes (GameWindow.RefreshInventory, RefreshCharacter, ...)
+## only mark their refresh dirty here. Flush, called once per frame, runs
+## every dirty refresh once in dependency order, so a burst of packets
+## rebuilds each window only one time. The counters tell how many requests
+## were collapsed into one run.
+##
+import traceLog
+
+class RefreshPipeline(object):
+
+	def __init__(self):
+		# [ (name, func), ... ] in run order
+		self.refreshList = []
+		self.refreshNameSet = set()
+		self.dirtySet = set()
+		self.isFlushing = False
+
+		# name -> [requestCount, runCount]
+		self.countDict = {}
+
+	## func runs after every refresh in afterNameList, they have to be registered already
+	def Register(self, name, func, afterNameList = ()):
+		if name in self.refreshNameSet:
+			import dbg
+			dbg.TraceError("RefreshPipeline.Register - %s is already registered" % (name))
+			return
+
+		# registered later than everything it depends on, so it also runs later
+		for afterName in afterNameList:
+			if afterName not in self.refreshNameSet:
+				import dbg
+				dbg.TraceError("RefreshPipeline.Register - %s has to be registered before %s" % (afterName, name))
+				return
+
+		self.refreshList.append((name, func))
+		self.refreshNameSet.add(name)
+		self.countDict.setdefault(name, [0, 0])
+
+	def Request(self, name):
+		if name not in self.refreshNameSet:
+			import dbg
+			dbg.TraceError("RefreshPipeline.Request - unknown refresh %s" % (name))
+			return
+
+		self.countDict[name][0] += 1
+		self.dirtySet.add(name)
+
+	def IsDirty(self, name):
+		return name in self.dirtySet
+
+	def Flush(self):
+		if not self.dirtySet or self.isFlushing:
+			return
+
+		self.isFlushing = True
+
+		try:
+			for (name, func) in self.refreshList:
+				# requested again by an earlier refresh of this flush still runs once
+				if name not in self.dirtySet:
+					continue
+
+				self.dirtySet.discard(name)
+				self.countDict[name][1] += 1
+				func()
+		finally:
+			self.isFlushing = False
+
+	def Clear(self):
+		self.dirtySet = set()
+
+	def GetStatistics(self):
+		return [(name, self.countDict[name][0], self.countDict[name][1]) for (name, func) in self.refreshList]
+
+	def LogStatistics(self):
+		for (name, requestCount, runCount) in self.GetStatistics():
+			if requestCount:
+				traceLog.Info("refresh", "refresh %-24s %6d requests %6d runs %6d collapsed", name, requestCount, runCount, requestCount - runCount)
@@ -0,0 +1,122 @@
+##
+## Request Pipeline
+##
+## Sends chat command requests that the server answers with a separate
+## binary callback (ex. "/cube r_info" -> BINARY_Cube_MaterialInfo).
+## Only windowSize requests are in flight at once, replies are matched
+## to their request by key and unanswered requests are sent again after
+## timeout seconds. The priority of a request is taken when it is pushed
+## and only taken again by RefreshPriority, ex. when the view scrolls.
+##
+import gameClock
+import net
+
+DEFAULT_WINDOW_SIZE = 2
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_RETRY_COUNT = 2
+
+class RequestPipeline(object):
+
+	def __init__(self, windowSize = DEFAULT_WINDOW_SIZE, timeout = DEFAULT_TIMEOUT, retryCount = DEFAULT_RETRY_COUNT):
+		self.windowSize = max(1, windowSize)
+		self.timeout = timeout
+		self.retryCount = retryCount
+
+		self.sendEvent = net.SendChatPacket
+		self.priorityEvent = None
+		self.failEvent = None
+
+		self.Clear()
+
+	def Clear(self):
+		# key -> [priority, sequence, command]
+		self.pendingDict = {}
+		# key -> [command, sentTime, tryCount]
+		self.inFlightDict = {}
+		self.sequence = 0
+
+	def SetWindowSize(self, windowSize):
+		self.windowSize = max(1, windowSize)
+
+	def SetSendEvent(self, event):
+		self.sendEvent = event
+
+	## event(key) returns a sort value, the lowest is sent first
+	def SetPriorityEvent(self, event):
+		self.priorityEvent = event
+		self.RefreshPriority()
+
+	## takes the priority of every pending request again
+	def RefreshPriority(self):
+		for (key, request) in self.pendingDict.iteritems():
+			request[0] = self.__GetPriority(key)
+
+	## event(key, command) is called when a request ran out of retries
+	def SetFailEvent(self, event):
+		self.failEvent = event
+
+	def Push(self, key, command):
+		if self.inFlightDict.has_key(key):
+			return
+
+		if self.pendingDict.has_key(key):
+			return
+
+		self.pendingDict[key] = [self.__GetPriority(key), self.sequence, command]
+		self.sequence += 1
+
+		self.__Fill(gameClock.GetTime())
+
+	def OnReply(self, key):
+		if not self.inFlightDict.has_key(key):
+			return False
+
+		del self.inFlightDict[key]
+		self.__Fill(gameClock.GetTime())
+		return True
+
+	def IsIdle(self):
+		return not self.pendingDict and not self.inFlightDict
+
+	def Update(self):
+		if not self.inFlightDict:
+			return
+
+		curTime = gameClock.GetTime()
+
+		for key, request in self.inFlightDict.items():
+			(command, sentTime, tryCount) = request
+			if curTime - sentTime < self.timeout:
+				continue
+
+			if tryCount > self.retryCount:
+				del self.inFlightDict[key]
+				if self.failEvent:
+					self.failEvent(key, command)
+				continue
+
+			request[1] = curTime
+			request[2] = tryCount + 1
+			self.sendEvent(command)
+
+		self.__Fill(curTime)
+
+	def __GetPriority(self, key):
+		if self.priorityEvent:
+			return self.priorityEvent(key)
+
+		return 0
+
+	def __PopNextKey(self):
+		pendingDict = self.pendingDict
+		nextKey = min(pendingDict, key = lambda k: pendingDict[k][:2])
+
+		command = pendingDict[nextKey][2]
+		del pendingDict[nextKey]
+		return (nextKey, command)
+
+	def __Fill(self, curTime):
+		while self.pendingDict and len(self.inFlightDict) < self.windowSize:
+			(key, command) = self.__PopNextKey()
+			self.inFlightDict[key] = [command, curTime, 1]
+			self.sendEvent(command)
@@ -0,0 +1,219 @@
+##
+## Root Archive
+##
+## Build step : python rootarchive.py build <archive file> [source directory]
+##   compiles every root module (*.py) into one archive of marshalled code
+##   objects with a name index in front. Every entry keeps the md5 of its
+##   source: building over an existing archive compiles again only the
+##   modules whose source changed. Build tools and ui layout scripts
+##   (a top level "window" dictionary) are left out.
+##
+## Runtime : rootArchive.Install(<archive file>) before the first root import
+##   reads the archive in one go and puts an importer on sys.meta_path
+##   that serves root modules from the in-memory index. Module names are
+##   matched case insensitively like the pack does (interfacemodule.py is
+##   imported as interfaceModule). Given a source directory, entries whose
+##   source there has changed are dropped and imported from the source.
+##
+import sys
+import os
+import re
+import imp
+import marshal
+import hashlib
+
+ARCHIVE_VERSION = 2
+
+# never put into the archive
+EXCLUDE_MODULE_LIST = ( "rootarchive", "atlasbuilder", "energybar", )
+
+LAYOUT_SCRIPT_PATTERN = re.compile(r"^window\s*=\s*\{", re.MULTILINE)
+
+def GetSourceHash(source):
+	return hashlib.md5(source).hexdigest()
+
+def IsLayoutScript(source):
+	return None != LAYOUT_SCRIPT_PATTERN.search(source)
+
+##
+## Build
+##
+def BuildArchive(archiveFileName, sourceDirectory = ".", excludeList = EXCLUDE_MODULE_LIST):
+	# moduleName -> (fileName, sourceHash, marshalled code)
+	index = {}
+	failedList = []
+	reusedCount = 0
+
+	oldIndex = LoadArchive(archiveFileName) or {}
+
+	for fileName in sorted(os.listdir(sourceDirectory)):
+		(moduleName, ext) = os.path.splitext(fileName)
+		if ".py" != ext.lower():
+			continue
+
+		moduleName = moduleName.lower()
+		if moduleName in excludeList:
+			continue
+
+		filePath = os.path.join(sourceDirectory, fileName)
+		source = open(filePath, "rU").read()
+
+		if IsLayoutScript(source):
+			continue
+
+		sourceHash = GetSourceHash(source)
+
+		oldEntry = oldIndex.get(moduleName)
+		if oldEntry and oldEntry[0] == fileName and oldEntry[1] == sourceHash:
+			index[moduleName] = oldEntry
+			reusedCount += 1
+			continue
+
+		try:
+			code = compile(source, fileName, "exec")
+		except SyntaxError, msg:
+			failedList.append((fileName, str(msg)))
+			continue
+
+		index[moduleName] = (fileName, sourceHash, marshal.dumps(code))
+
+	data = marshal.dumps((ARCHIVE_VERSION, imp.get_magic(), index))
+	open(archiveFileName, "wb").write(data)
+
+	return (index, failedList, reusedCount, len(data))
+
+def PrintBuildReport(archiveFileName, index, failedList, reusedCount, archiveSize):
+	print "root archive %s : %d modules (%d unchanged), %d bytes" % (archiveFileName, len(index), reusedCount, archiveSize)
+
+	for moduleName in sorted(index):
+		(fileName, sourceHash, codeData) = index[moduleName]
+		print "  %-32s %8d" % (fileName, len(codeData))
+
+	for (fileName, msg) in failedList:
+		print "  FAILED %s - %s" % (fileName, msg)
+
+##
+## Runtime
+##
+class RootArchiveImporter(object):
+	def __init__(self, archiveFileName, index):
+		self.archiveFileName = archiveFileName
+		self.index = index
+		# lower module name -> module, a module imported under two spellings stays one module
+		self.moduleDict = {}
+
+	def find_module(self, fullname, path = None):
+		if None != path:
+			return None
+
+		if not self.index.has_key(fullname.lower()):
+			return None
+
+		return self
+
+	def load_module(self, fullname):
+		if sys.modules.has_key(fullname):
+			return sys.modules[fullname]
+
+		moduleName = fullname.lower()
+
+		module = self.moduleDict.get(moduleName)
+		if module:
+			sys.modules[fullname] = module
+			return module
+
+		(fileName, sourceHash, codeData) = self.index[moduleName]
+
+		module = imp.new_module(fullname)
+		module.__file__ = fileName
+		module.__loader__ = self
+
+		sys.modules[fullname] = module
+		self.moduleDict[moduleName] = module
+
+		try:
+			exec marshal.loads(codeData) in module.__dict__
+		except:
+			del sys.modules[fullname]
+			del self.moduleDict[moduleName]
+			raise
+
+		return module
+
+rootArchiveImporter = None
+
+def LoadArchive(archiveFileName, openFunc = open):
+	try:
+		data = openFunc(archiveFileName, "rb").read()
+	except IOError:
+		return None
+
+	try:
+		(version, magic, index) = marshal.loads(data)
+	except (EOFError, ValueError, TypeError):
+		return None
+
+	if ARCHIVE_VERSION != version or imp.get_magic() != magic:
+		return None
+
+	return index
+
+## drops the entries whose source in sourceDirectory is not the archived one
+def DropStaleEntries(index, sourceDirectory, openFunc = open):
+	staleList = []
+
+	for (moduleName, (fileName, sourceHash, codeData)) in index.items():
+		try:
+			source = openFunc(os.path.join(sourceDirectory, fileName), "rU").read()
+		except IOError:
+			continue
+
+		if GetSourceHash(source) != sourceHash:
+			del index[moduleName]
+			staleList.append(moduleName)
+
+	return staleList
+
+def Install(archiveFileName, openFunc = open, sourceDirectory = None):
+	global rootArchiveImporter
+
+	if rootArchiveImporter:
+		return True
+
+	index = LoadArchive(archiveFileName, openFunc)
+	if None == index:
+		return False
+
+	if None != sourceDirectory:
+		DropStaleEntries(index, sourceDirectory, openFunc)
+
+	rootArchiveImporter = RootArchiveImporter(archiveFileName, index)
+	sys.meta_path.insert(0, rootArchiveImporter)
+	return True
+
+def Uninstall():
+	global rootArchiveImporter
+
+	if not rootArchiveImporter:
+		return
+
+	if rootArchiveImporter in sys.meta_path:
+		sys.meta_path.remove(rootArchiveImporter)
+
+	rootArchiveImporter = None
+
+if __name__ == "__main__":
+	if len(sys.argv) < 3 or "build" != sys.argv[1]:
+		print "usage: python rootarchive.py build <archive file> [source directory]"
+		sys.exit(1)
+
+	if len(sys.argv) > 3:
+		sourceDirectory = sys.argv[3]
+	else:
+		sourceDirectory = "."
+
+	(index, failedList, reusedCount, archiveSize) = BuildArchive(sys.argv[2], sourceDirectory)
+	PrintBuildReport(sys.argv[2], index, failedList, reusedCount, archiveSize)
+
+	if failedList:
+		sys.exit(1)
@@ -0,0 +1,140 @@
+##
+## Screenshot Queue
+##
+## Key presses only queue a capture request, the captures are taken from
+## GameWindow.OnUpdate at most one per frame. A burst is a number of
+## captures at a fixed interval. The queue is bounded, requests that do not
+## fit are dropped instead of piling up behind a slow disk.
+## The screenshot directory is checked and made on a worker thread, the
+## captures wait for it instead of the frame. A failed capture makes the
+## next request check the directory again.
+## grp has no call handing out the frame buffer, the encode and the write
+## stay in the grp.SaveScreenShot call of the capture frame.
+##
+import os
+import gameClock
+
+try:
+	import threading
+except ImportError:
+	threading = None
+
+DEFAULT_BURST_COUNT = 5
+DEFAULT_BURST_INTERVAL = 0.5
+# a whole burst and a single capture
+DEFAULT_QUEUE_SIZE = DEFAULT_BURST_COUNT + 1
+
+class ScreenShotQueue(object):
+
+	def __init__(self, queueSize = DEFAULT_QUEUE_SIZE):
+		self.queueSize = max(1, queueSize)
+
+		self.saveEvent = None
+		self.resultEvent = None
+
+		self.directory = None
+		self.isDirectoryReady = True
+		self.directoryThread = None
+
+		self.Clear()
+
+	def Clear(self):
+		# capture times, sorted
+		self.requestList = []
+		self.droppedCount = 0
+
+	## the captures go to directory, None for the engine's own
+	def SetDirectory(self, directory):
+		self.directory = directory
+		self.isDirectoryReady = None == directory
+
+	## checks the directory again before the next capture
+	def InvalidateDirectory(self):
+		if not self.directory:
+			return
+
+		self.isDirectoryReady = False
+		if self.requestList:
+			self.__PrepareDirectory()
+
+	## event() returns (succeeded, name)
+	def SetSaveEvent(self, event):
+		self.saveEvent = event
+
+	## event(succeeded, name)
+	def SetResultEvent(self, event):
+		self.resultEvent = event
+
+	def Request(self):
+		return self.__Push(gameClock.GetTime())
+
+	def StartBurst(self, count = DEFAULT_BURST_COUNT, interval = DEFAULT_BURST_INTERVAL):
+		curTime = gameClock.GetTime()
+
+		pushedCount = 0
+		for i in xrange(count):
+			if self.__Push(curTime + i * interval):
+				pushedCount += 1
+
+		return pushedCount
+
+	def GetDroppedCount(self):
+		return self.droppedCount
+
+	def __Push(self, captureTime):
+		if len(self.requestList) >= self.queueSize:
+			self.droppedCount += 1
+			return False
+
+		self.requestList.append(captureTime)
+		self.requestList.sort()
+
+		if not self.isDirectoryReady:
+			self.__PrepareDirectory()
+
+		return True
+
+	def __PrepareDirectory(self):
+		if self.directoryThread and self.directoryThread.isAlive():
+			return
+
+		if not threading:
+			self.__MakeDirectory(self.directory)
+			return
+
+		self.directoryThread = threading.Thread(target = self.__MakeDirectory, args = (self.directory,), name = "screenShotQueue")
+		self.directoryThread.setDaemon(True)
+		self.directoryThread.start()
+
+	## runs on the worker thread
+	def __MakeDirectory(self, directory):
+		try:
+			if not os.path.isdir(directory):
+				os.mkdir(directory)
+		except OSError:
+			pass
+
+		# a failed mkdir leaves it to the capture to fail and ask again
+		if directory == self.directory:
+			self.isDirectoryReady = True
+
+	def Update(self):
+		if not self.requestList:
+			return
+
+		curTime = gameClock.GetTime()
+		if self.requestList[0] > curTime:
+			return
+
+		if not self.isDirectoryReady:
+			return
+
+		del self.requestList[0]
+
+		if not self.saveEvent:
+			return
+
+		(succeeded, name) = self.saveEvent()
+
+		if self.resultEvent:
+			self.resultEvent(succeeded, name)
@@ -0,0 +1,106 @@
+##
+## Startup Tracer
+##
+## Nested timing spans from entering the game phase to the first frame.
+## Start opens a new trace, Begin/End wrap each step and Flush writes the
+## spans as a Chrome trace event file (chrome://tracing, Perfetto), one
+## file per login, so startups can be compared across builds and PCs.
+## Tracing is off unless STARTUP_TRACE_ENABLE is set, only the newest
+## MAX_TRACE_FILE_COUNT files are kept.
+##
+import time
+import os
+
+STARTUP_TRACE_ENABLE = False
+STARTUP_TRACE_DIR = "trace"
+MAX_TRACE_FILE_COUNT = 8
+
+traceName = None
+startClock = 0.0
+# [ (name, beginClock, endClock), ... ]
+spanList = []
+# [ (name, beginClock), ... ]
+openSpanStack = []
+
+def Start(name):
+	global traceName, startClock, spanList, openSpanStack
+
+	if not STARTUP_TRACE_ENABLE:
+		return
+
+	traceName = name
+	startClock = time.clock()
+	spanList = []
+	openSpanStack = []
+
+def IsTracing():
+	return None != traceName
+
+def Begin(name):
+	if None == traceName:
+		return
+
+	openSpanStack.append((name, time.clock()))
+
+def End():
+	if None == traceName or not openSpanStack:
+		return
+
+	(name, beginClock) = openSpanStack.pop()
+	spanList.append((name, beginClock, time.clock()))
+
+def __EscapeJSONString(text):
+	return text.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t")
+
+def __MakeTraceEvent(name, beginClock, endClock):
+	return "{\"name\":\"%s\",\"cat\":\"startup\",\"ph\":\"X\",\"ts\":%d,\"dur\":%d,\"pid\":1,\"tid\":1}" % (
+		__EscapeJSONString(name), int((beginClock - startClock) * 1000000.0), int((endClock - beginClock) * 1000000.0))
+
+def Flush():
+	global traceName
+
+	if None == traceName:
+		return None
+
+	# spans still open at flush time end here
+	while openSpanStack:
+		End()
+
+	eventList = [__MakeTraceEvent(name, beginClock, endClock) for (name, beginClock, endClock) in spanList]
+
+	fileName = "%s%s%s_%s.json" % (STARTUP_TRACE_DIR, os.sep, traceName, time.strftime("%Y%m%d_%H%M%S"))
+
+	try:
+		if not os.path.exists(STARTUP_TRACE_DIR):
+			os.mkdir(STARTUP_TRACE_DIR)
+
+		old_open(fileName, "w").write("{\"traceEvents\":[\n%s\n],\"displayTimeUnit\":\"ms\"}\n" % (",\n".join(eventList)))
+	except (IOError, OSError), msg:
+		import dbg
+		dbg.TraceError("startupTracer.Flush - %s" % (msg))
+		fileName = None
+
+	traceName = None
+
+	if fileName:
+		__RemoveOldTraceFiles()
+
+	return fileName
+
+def __RemoveOldTraceFiles():
+	try:
+		fileNameList = [fileName for fileName in os.listdir(STARTUP_TRACE_DIR) if fileName.endswith(".json")]
+	except OSError:
+		return
+
+	if len(fileNameList) <= MAX_TRACE_FILE_COUNT:
+		return
+
+	pathList = [os.path.join(STARTUP_TRACE_DIR, fileName) for fileName in fileNameList]
+	pathList.sort(key = os.path.getmtime)
+
+	for path in pathList[:-MAX_TRACE_FILE_COUNT]:
+		try:
+			os.remove(path)
+		except OSError:
+			pass
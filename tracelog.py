@@ -0,0 +1,208 @@
+##
+## Trace Log
+##
+## Leveled log records instead of print. traceLog.Debug/Info/Warning/Error
+## take a category, a format and its arguments:
+##
+##   traceLog.Debug("affect", "AddAffect(type=%d, duration=%d)", type, duration)
+##
+## Levels below the current one are bound to a function doing nothing, so
+## a disabled call costs one call and the format is never applied. Always
+## call them through the module (traceLog.Debug), SetLevel rebinds them.
+## Records go to a ring buffer in memory, a background thread appends them
+## to TRACE_LOG_FILE_NAME every FLUSH_PERIOD seconds or when the buffer is
+## half full. An uncaught exception writes the buffer before the client
+## goes down. When the buffer overflows the oldest records are dropped and
+## counted.
+##
+import sys
+import time
+import atexit
+from collections import deque
+
+try:
+	import threading
+except ImportError:
+	threading = None
+
+LEVEL_DEBUG = 0
+LEVEL_INFO = 1
+LEVEL_WARNING = 2
+LEVEL_ERROR = 3
+LEVEL_NONE = 4
+
+LEVEL_NAME_LIST = ( "DEBUG", "INFO", "WARNING", "ERROR" )
+
+TRACE_LOG_LEVEL = LEVEL_WARNING
+TRACE_LOG_FILE_NAME = "tracelog.txt"
+RING_BUFFER_SIZE = 1024
+FLUSH_PERIOD = 5.0
+
+# (time, level, category, text)
+ringBuffer = deque(maxlen = RING_BUFFER_SIZE)
+droppedCount = 0
+disabledCategorySet = set()
+level = TRACE_LOG_LEVEL
+
+isStarted = False
+writerThread = None
+writeLock = threading.Lock() if threading else None
+flushEvent = threading.Event() if threading else None
+stopEvent = threading.Event() if threading else None
+previousExceptHook = None
+
+def __Null(category, fmt, *args):
+	pass
+
+def __Append(recordLevel, category, text):
+	global droppedCount
+
+	if not isStarted:
+		Start()
+
+	if len(ringBuffer) == RING_BUFFER_SIZE:
+		droppedCount += 1
+
+	ringBuffer.append((time.time(), recordLevel, category, text))
+
+	if len(ringBuffer) >= RING_BUFFER_SIZE / 2:
+		__RequestFlush()
+
+def __MakeWriter(recordLevel):
+	def Write(category, fmt, *args):
+		if category in disabledCategorySet:
+			return
+
+		if args:
+			fmt = fmt % args
+
+		__Append(recordLevel, category, fmt)
+
+	return Write
+
+def SetLevel(newLevel):
+	global level, Debug, Info, Warning, Error
+
+	level = newLevel
+
+	Debug = __MakeWriter(LEVEL_DEBUG) if newLevel <= LEVEL_DEBUG else __Null
+	Info = __MakeWriter(LEVEL_INFO) if newLevel <= LEVEL_INFO else __Null
+	Warning = __MakeWriter(LEVEL_WARNING) if newLevel <= LEVEL_WARNING else __Null
+	Error = __MakeWriter(LEVEL_ERROR) if newLevel <= LEVEL_ERROR else __Null
+
+def GetLevel():
+	return level
+
+def SetCategoryEnabled(category, isEnabled):
+	if isEnabled:
+		disabledCategorySet.discard(category)
+	else:
+		disabledCategorySet.add(category)
+
+SetLevel(TRACE_LOG_LEVEL)
+
+##
+## Writing
+##
+def __FormatRecord(record):
+	(recordTime, recordLevel, category, text) = record
+	return "%s.%03d %-7s [%s] %s" % (time.strftime("%H:%M:%S", time.localtime(recordTime)), int(recordTime * 1000.0) % 1000,
+		LEVEL_NAME_LIST[recordLevel], category, text)
+
+def __WriteRecords():
+	global droppedCount
+
+	lineList = []
+
+	if droppedCount:
+		lineList.append("... %d records dropped" % (droppedCount))
+		droppedCount = 0
+
+	while True:
+		try:
+			record = ringBuffer.popleft()
+		except IndexError:
+			break
+
+		lineList.append(__FormatRecord(record))
+
+	if not lineList:
+		return
+
+	try:
+		old_open(TRACE_LOG_FILE_NAME, "a").write("\n".join(lineList) + "\n")
+	except IOError:
+		pass
+
+def __RunWriter():
+	while not stopEvent.isSet():
+		flushEvent.wait(FLUSH_PERIOD)
+		flushEvent.clear()
+		Flush()
+
+def __RequestFlush():
+	if writerThread:
+		flushEvent.set()
+	else:
+		Flush()
+
+## Writes the buffered records now
+def Flush():
+	if writeLock:
+		writeLock.acquire()
+
+	try:
+		__WriteRecords()
+	finally:
+		if writeLock:
+			writeLock.release()
+
+def __ExceptHook(exceptionType, value, traceback):
+	# written even when the error level is off
+	__Append(LEVEL_ERROR, "crash", "%s: %s" % (getattr(exceptionType, "__name__", exceptionType), value))
+	Flush()
+
+	if previousExceptHook:
+		previousExceptHook(exceptionType, value, traceback)
+
+##
+## Start / Stop
+##
+## Start is called by the first record, Stop writes what is left
+def Start():
+	global isStarted, writerThread, previousExceptHook
+
+	if isStarted:
+		return
+
+	isStarted = True
+
+	previousExceptHook = sys.excepthook
+	sys.excepthook = __ExceptHook
+	atexit.register(Stop)
+
+	if threading:
+		stopEvent.clear()
+		writerThread = threading.Thread(target = __RunWriter, name = "traceLog")
+		writerThread.setDaemon(True)
+		writerThread.start()
+
+def Stop():
+	global isStarted, writerThread, previousExceptHook
+
+	if not isStarted:
+		return
+
+	isStarted = False
+
+	if writerThread:
+		stopEvent.set()
+		flushEvent.set()
+		writerThread.join(FLUSH_PERIOD)
+		writerThread = None
+
+	if previousExceptHook:
+		sys.excepthook = previousExceptHook
+		previousExceptHook = None
+
+	Flush()
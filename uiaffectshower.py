@@ -7,6 +7,24 @@ import skill
 import player
 import uiToolTip
 import math
+import updateScheduler
+import gameClock
+import imageCache
+import heapq
+import traceLog
+
+# AFFECT_ATLAS
+# affectAtlasData is made by atlasbuilder.py, without it every icon loads its own texture
+try:
+	import affectAtlasData
+	ATLAS_SUB_IMAGE_DICT = affectAtlasData.ATLAS_SUB_IMAGE_DICT
+except ImportError:
+	ATLAS_SUB_IMAGE_DICT = {}
+
+## icon path -> its sub image in the affect atlas, or the path itself when it isn't packed
+def GetIconFileName(fileName):
+	return ATLAS_SUB_IMAGE_DICT.get(imageCache.NormalizePath(fileName), fileName)
+# END_OF_AFFECT_ATLAS
 
 # WEDDING
 class LovePointImage(ui.ExpandedImageBox):
@@ -52,9 +70,7 @@ class LovePointImage(ui.ExpandedImageBox):
 			loveGrade = self.lovePoint / 25 + 1
 		fileName = self.FILE_DICT.get(loveGrade, self.FILE_PATH+"00.dds")
 
-		try:
-			self.LoadImage(fileName)
-		except:
+		if not imageCache.LoadImage(self, GetIconFileName(fileName)):
 			import dbg
 			dbg.TraceError("LovePointImage.SetLoverInfo(lovePoint=%d) - LoadError %s" % (self.lovePoint, fileName))
 
@@ -119,7 +135,7 @@ class HorseImage(ui.ExpandedImageBox):
 				grade = self.__GetHorseGrade(level)
 				self.__AppendText(localeInfo.LEVEL_LIST[grade])
 			except IndexError:
-				print "HorseImage.SetState(level=%d, health=%d, battery=%d) - Unknown Index" % (level, health, battery)
+				traceLog.Warning("affect", "HorseImage.SetState(level=%d, health=%d, battery=%d) - Unknown Index", level, health, battery)
 				return
 
 			try:
@@ -127,7 +143,7 @@ class HorseImage(ui.ExpandedImageBox):
 				if len(healthName)>0:
 					self.__AppendText(healthName)
 			except IndexError:
-				print "HorseImage.SetState(level=%d, health=%d, battery=%d) - Unknown Index" % (level, health, battery)
+				traceLog.Warning("affect", "HorseImage.SetState(level=%d, health=%d, battery=%d) - Unknown Index", level, health, battery)
 				return
 
 			if health>0:
@@ -137,12 +153,10 @@ class HorseImage(ui.ExpandedImageBox):
 			try:
 				fileName=self.FILE_DICT[health*10+battery]
 			except KeyError:
-				print "HorseImage.SetState(level=%d, health=%d, battery=%d) - KeyError" % (level, health, battery)
+				traceLog.Warning("affect", "HorseImage.SetState(level=%d, health=%d, battery=%d) - KeyError", level, health, battery)
 
-			try:
-				self.LoadImage(fileName)
-			except:
-				print "HorseImage.SetState(level=%d, health=%d, battery=%d) - LoadError %s" % (level, health, battery, fileName)
+			if not imageCache.LoadImage(self, GetIconFileName(fileName)):
+				traceLog.Warning("affect", "HorseImage.SetState(level=%d, health=%d, battery=%d) - LoadError %s", level, health, battery, fileName)
 
 		self.SetScale(0.7, 0.7)
 
@@ -207,8 +221,6 @@ class AutoPotionImage(ui.ExpandedImageBox):
 		self.__Refresh()
 
 	def __Refresh(self):
-		print "__Refresh"
-
 		isActivated, currentAmount, totalAmount, slotIndex = player.GetAutoPotionInfo(self.potionType)
 
 		amountPercent = (float(currentAmount) / totalAmount) * 100.0
@@ -225,11 +237,9 @@ class AutoPotionImage(ui.ExpandedImageBox):
 		fmt = self.filePath + "%.2d.dds"
 		fileName = fmt % grade
 
-		print self.potionType, amountPercent, fileName
+		traceLog.Debug("affect", "AutoPotionImage.__Refresh(potionType=%d) - %.1f%% %s", self.potionType, amountPercent, fileName)
 
-		try:
-			self.LoadImage(fileName)
-		except:
+		if not imageCache.LoadImage(self, GetIconFileName(fileName)):
 			import dbg
 			dbg.TraceError("AutoPotionImage.__Refresh(potionType=%d) - LoadError %s" % (self.potionType, fileName))
 
@@ -255,6 +265,8 @@ class AutoPotionImage(ui.ExpandedImageBox):
 
 class AffectImage(ui.ExpandedImageBox):
 
+	AUTO_POTION_DESCRIPTION_PERIOD = 1
+
 	def __init__(self):
 		ui.ExpandedImageBox.__init__(self)
 
@@ -265,6 +277,12 @@ class AffectImage(ui.ExpandedImageBox):
 		self.affect = None
 		self.isClocked = True
 
+		# DESCRIPTION_DEADLINE
+		self.isDescriptionDirty = False
+		self.isMouseOver = False
+		self.descriptionSequence = 0
+		# END_OF_DESCRIPTION_DEADLINE
+
 	def SetAffect(self, affect):
 		self.affect = affect
 
@@ -294,7 +312,7 @@ class AffectImage(ui.ExpandedImageBox):
 	def SetDuration(self, duration):
 		self.endTime = 0
 		if duration > 0:
-			self.endTime = app.GetGlobalTimeStamp() + duration
+			self.endTime = gameClock.GetGlobalTimeStamp() + duration
 
 	def UpdateAutoPotionDescription(self):
 
@@ -320,6 +338,48 @@ class AffectImage(ui.ExpandedImageBox):
 	def SetClock(self, isClocked):
 		self.isClocked = isClocked
 
+	# DESCRIPTION_DEADLINE
+	def IsAutoPotion(self):
+		return self.affect == chr.NEW_AFFECT_AUTO_HP_RECOVERY or self.affect == chr.NEW_AFFECT_AUTO_SP_RECOVERY
+
+	## Time stamp the description text changes at next, 0 when it doesn't change anymore
+	def GetDescriptionDeadline(self):
+		curTime = gameClock.GetGlobalTimeStamp()
+
+		# the amount left changes with every potion used, so it is polled
+		if self.IsAutoPotion():
+			return curTime + self.AUTO_POTION_DESCRIPTION_PERIOD
+
+		if not self.isClocked or not self.description or self.endTime <= 0:
+			return 0
+
+		# SecondToDHM shows whole minutes, the text changes when the left time drops below the next multiple of 60
+		leftTime = self.endTime - curTime
+		if leftTime < 60:
+			# below a minute the arabic locale shows the seconds
+			if localeInfo.IsARABIC() and leftTime > 0:
+				return curTime + 1
+
+			return 0
+
+		return self.endTime - (leftTime / 60) * 60 + 1
+
+	## The description is out of date, it is made again now when the tooltip is shown, otherwise on the next mouse over
+	def InvalidateDescription(self):
+		if self.isMouseOver:
+			self.RefreshDescription()
+		else:
+			self.isDescriptionDirty = True
+
+	def RefreshDescription(self):
+		self.isDescriptionDirty = False
+
+		if self.IsAutoPotion():
+			self.UpdateAutoPotionDescription()
+		else:
+			self.UpdateDescription()
+	# END_OF_DESCRIPTION_DEADLINE
+
 	def UpdateDescription(self):
 		if not self.isClocked:
 			self.__UpdateDescription2()
@@ -330,7 +390,7 @@ class AffectImage(ui.ExpandedImageBox):
 
 		toolTip = self.description
 		if self.endTime > 0:
-			leftTime = localeInfo.SecondToDHM(self.endTime - app.GetGlobalTimeStamp())
+			leftTime = localeInfo.SecondToDHM(self.endTime - gameClock.GetGlobalTimeStamp())
 			toolTip += " (%s : %s)" % (localeInfo.LEFT_TIME, leftTime)
 		self.SetToolTipText(toolTip, 0, 40)
 
@@ -348,10 +408,15 @@ class AffectImage(ui.ExpandedImageBox):
 		return self.isSkillAffect
 
 	def OnMouseOverIn(self):
+		self.isMouseOver = True
+		if self.isDescriptionDirty:
+			self.RefreshDescription()
+
 		if self.toolTipText:
 			self.toolTipText.Show()
 
 	def OnMouseOverOut(self):
+		self.isMouseOver = False
 		if self.toolTipText:
 			self.toolTipText.Hide()
 
@@ -438,19 +503,52 @@ class AffectShower(ui.Window):
 		self.serverPlayTime=0
 		self.clientPlayTime=0
 
-		self.lastUpdateTime=0
 		self.affectImageDict={}
 		self.horseImage=None
 		self.lovePointImage=None
+
+		# AFFECT_SLOT
+		# affect images in the order they were added, their position on the bar
+		self.affectSlotList = []
+		# affect -> index in affectSlotList
+		self.affectSlotIndexDict = {}
+		# slots from this index on are laid out on the next update, None when nothing moved
+		self.arrangeFromIndex = None
+		self.arrangedSlotStartX = 0
+		# END_OF_AFFECT_SLOT
+
 		self.autoPotionImageHP = AutoPotionImage()
 		self.autoPotionImageSP = AutoPotionImage()
 		self.SetPosition(10, 10)
+
+		# (deadline, sequence, affect), entries of removed images are skipped by sequence
+		self.descriptionHeap = []
+		self.descriptionSequence = 0
 		self.Show()
 
+		self.descriptionUpdateHandle = updateScheduler.Register(ui.__mem_func__(self.__UpdateDescription), 500, updateScheduler.PRIORITY_LOW)
+
+	def Destroy(self):
+		if self.descriptionUpdateHandle:
+			updateScheduler.Unregister(self.descriptionUpdateHandle)
+			self.descriptionUpdateHandle = None
+
+		self.ClearAllAffects()
+
 	def ClearAllAffects(self):
+		for image in self.affectImageDict.itervalues():
+			imageCache.Release(image)
+		if self.horseImage:
+			imageCache.Release(self.horseImage)
+		if self.lovePointImage:
+			imageCache.Release(self.lovePointImage)
+
 		self.horseImage=None
 		self.lovePointImage=None
 		self.affectImageDict={}
+		self.affectSlotList = []
+		self.affectSlotIndexDict = {}
+		self.descriptionHeap = []
 		self.__ArrangeImageList()
 
 	def ClearAffects(self):
@@ -458,12 +556,24 @@ class AffectShower(ui.Window):
 		for key, image in self.affectImageDict.items():
 			if not image.IsSkillAffect():
 				self.living_affectImageDict[key] = image
+			else:
+				imageCache.Release(image)
 		self.affectImageDict = self.living_affectImageDict
-		self.__ArrangeImageList()
+
+		# the living images keep their order, everything from the first removed one moves
+		firstIndex = len(self.affectSlotList)
+		for (index, image) in enumerate(self.affectSlotList):
+			if image.IsSkillAffect():
+				firstIndex = index
+				break
+
+		self.affectSlotList = [image for image in self.affectSlotList if not image.IsSkillAffect()]
+		self.affectSlotIndexDict = dict([(image.GetAffect(), index) for (index, image) in enumerate(self.affectSlotList)])
+		self.__ArrangeImageList(firstIndex)
 
 	def BINARY_NEW_AddAffect(self, type, pointIdx, value, duration):
 
-		print "BINARY_NEW_AddAffect", type, pointIdx, value, duration
+		traceLog.Debug("affect", "BINARY_NEW_AddAffect(type=%d, pointIdx=%d, value=%d, duration=%d)", type, pointIdx, value, duration)
 
 		if type < 500:
 			return
@@ -497,11 +607,13 @@ class AffectShower(ui.Window):
 		if affect != chr.NEW_AFFECT_AUTO_SP_RECOVERY and affect != chr.NEW_AFFECT_AUTO_HP_RECOVERY:
 			description = description(float(value))
 
+		image = None
 		try:
-			print "Add affect %s" % affect
+			traceLog.Debug("affect", "Add affect %s", affect)
 			image = AffectImage()
 			image.SetParent(self)
-			image.LoadImage(filename)
+			if not imageCache.LoadImage(image, GetIconFileName(filename)):
+				raise RuntimeError, "LoadError %s" % (filename)
 			image.SetDescription(description)
 			image.SetDuration(duration)
 			image.SetAffect(affect)
@@ -509,11 +621,7 @@ class AffectShower(ui.Window):
 				affect == chr.NEW_AFFECT_EXP_BONUS_EURO_FREE_UNDER_15 or\
 				self.INFINITE_AFFECT_DURATION < duration:
 				image.SetClock(False)
-				image.UpdateDescription()
-			elif affect == chr.NEW_AFFECT_AUTO_SP_RECOVERY or affect == chr.NEW_AFFECT_AUTO_HP_RECOVERY:
-				image.UpdateAutoPotionDescription()
-			else:
-				image.UpdateDescription()
+			image.InvalidateDescription()
 
 			if affect == chr.NEW_AFFECT_DRAGON_SOUL_DECK1 or affect == chr.NEW_AFFECT_DRAGON_SOUL_DECK2:
 				image.SetScale(1, 1)
@@ -521,11 +629,15 @@ class AffectShower(ui.Window):
 				image.SetScale(0.7, 0.7)
 			image.SetSkillAffectFlag(False)
 			image.Show()
-			self.affectImageDict[affect] = image
-			self.__ArrangeImageList()
+			self.__AppendAffectSlot(affect, image)
+			self.__PushDescriptionDeadline(affect, image)
 		except Exception, e:
-			print "except Aff affect ", e
-			pass
+			traceLog.Error("affect", "BINARY_NEW_AddAffect(affect=%s) - %s", affect, e)
+
+			# loaded but never shown
+			if image and self.affectImageDict.get(affect) != image:
+				image.Hide()
+				imageCache.Release(image)
 
 	def BINARY_NEW_RemoveAffect(self, type, pointIdx):
 		if type == chr.NEW_AFFECT_MALL:
@@ -533,19 +645,20 @@ class AffectShower(ui.Window):
 		else:
 			affect = type
 
-		print "Remove Affect %s %s" % ( type , pointIdx )
+		traceLog.Debug("affect", "Remove Affect %s %s", type, pointIdx)
 		self.__RemoveAffect(affect)
-		self.__ArrangeImageList()
 
 	def SetAffect(self, affect):
 		self.__AppendAffect(affect)
-		self.__ArrangeImageList()
 
 	def ResetAffect(self, affect):
 		self.__RemoveAffect(affect)
-		self.__ArrangeImageList()
 
 	def SetLoverInfo(self, name, lovePoint):
+		if self.lovePointImage:
+			self.lovePointImage.Hide()
+			imageCache.Release(self.lovePointImage)
+
 		image = LovePointImage()
 		image.SetParent(self)
 		image.SetLoverInfo(name, lovePoint)
@@ -563,6 +676,8 @@ class AffectShower(ui.Window):
 			self.__ArrangeImageList()
 
 	def ClearLoverState(self):
+		if self.lovePointImage:
+			imageCache.Release(self.lovePointImage)
 		self.lovePointImage = None
 		self.__ArrangeImageList()
 
@@ -571,6 +686,9 @@ class AffectShower(ui.Window):
 			self.lovePointImage.OnUpdateLovePoint(lovePoint)
 
 	def SetHorseState(self, level, health, battery):
+		if self.horseImage:
+			imageCache.Release(self.horseImage)
+
 		if level==0:
 			self.horseImage=None
 		else:
@@ -580,11 +698,12 @@ class AffectShower(ui.Window):
 			image.Show()
 
 			self.horseImage=image
-			self.__ArrangeImageList()
+
+		self.__ArrangeImageList()
 
 	def SetPlayTime(self, playTime):
 		self.serverPlayTime = playTime
-		self.clientPlayTime = app.GetTime()
+		self.clientPlayTime = gameClock.GetTime()
 
 		if localeInfo.IsVIETNAM():
 			image = PlayTimeImage()
@@ -616,15 +735,13 @@ class AffectShower(ui.Window):
 		image.SetParent(self)
 		image.SetSkillAffectFlag(True)
 
-		try:
-			image.LoadImage(filename)
-		except:
-			pass
+		imageCache.LoadImage(image, GetIconFileName(filename))
 
 		image.SetToolTipText(name, 0, 40)
 		image.SetScale(0.7, 0.7)
+		image.SetAffect(affect)
 		image.Show()
-		self.affectImageDict[affect] = image
+		self.__AppendAffectSlot(affect, image)
 
 	def __RemoveAffect(self, affect):
 		"""
@@ -636,17 +753,45 @@ class AffectShower(ui.Window):
 		"""
 
 		if not self.affectImageDict.has_key(affect):
-			print "__RemoveAffect %s ( No Affect )" % affect
+			traceLog.Debug("affect", "__RemoveAffect %s ( No Affect )", affect)
 			return
 
-		print "__RemoveAffect %s ( Affect )" % affect
+		traceLog.Debug("affect", "__RemoveAffect %s ( Affect )", affect)
+		imageCache.Release(self.affectImageDict[affect])
 		del self.affectImageDict[affect]
 
-		self.__ArrangeImageList()
+		self.__RemoveAffectSlot(affect)
+
+	# AFFECT_SLOT
+	def __AppendAffectSlot(self, affect, image):
+		self.affectImageDict[affect] = image
+		self.affectSlotIndexDict[affect] = len(self.affectSlotList)
+		self.affectSlotList.append(image)
+
+		self.__ArrangeImageList(len(self.affectSlotList) - 1)
+
+	## Only the images after the removed one move one step to the left
+	def __RemoveAffectSlot(self, affect):
+		index = self.affectSlotIndexDict.pop(affect, None)
+		if None == index:
+			return
+
+		del self.affectSlotList[index]
+		for nextIndex in xrange(index, len(self.affectSlotList)):
+			self.affectSlotIndexDict[self.affectSlotList[nextIndex].GetAffect()] = nextIndex
+
+		self.__ArrangeImageList(index)
+
+	## Marks the slots from fromIndex on to be laid out, the layout itself runs once in the next OnUpdate
+	def __ArrangeImageList(self, fromIndex = 0):
+		if None == self.arrangeFromIndex or fromIndex < self.arrangeFromIndex:
+			self.arrangeFromIndex = fromIndex
 
-	def __ArrangeImageList(self):
+	def __LayoutImageList(self):
+		fromIndex = self.arrangeFromIndex
+		self.arrangeFromIndex = None
 
-		width = len(self.affectImageDict) * self.IMAGE_STEP
+		width = len(self.affectSlotList) * self.IMAGE_STEP
 		if self.lovePointImage:
 			width+=self.IMAGE_STEP
 		if self.horseImage:
@@ -665,22 +810,48 @@ class AffectShower(ui.Window):
 			self.horseImage.SetPosition(xPos, 0)
 			xPos += self.IMAGE_STEP
 
-		for image in self.affectImageDict.values():
-			image.SetPosition(xPos, 0)
-			xPos += self.IMAGE_STEP
+		# the love point or horse image came or went, every slot moves
+		if xPos != self.arrangedSlotStartX:
+			self.arrangedSlotStartX = xPos
+			fromIndex = 0
+
+		for index in xrange(fromIndex, len(self.affectSlotList)):
+			self.affectSlotList[index].SetPosition(xPos + index * self.IMAGE_STEP, 0)
 
 	def OnUpdate(self):
+		if None != self.arrangeFromIndex:
+			self.__LayoutImageList()
+	# END_OF_AFFECT_SLOT
+
+	# DESCRIPTION_DEADLINE
+	def __PushDescriptionDeadline(self, affect, image):
+		deadline = image.GetDescriptionDeadline()
+		if not deadline:
+			return
+
+		self.descriptionSequence += 1
+		image.descriptionSequence = self.descriptionSequence
+		heapq.heappush(self.descriptionHeap, (deadline, self.descriptionSequence, affect))
+
+	## Only the images whose description text has changed since, earliest first
+	def __UpdateDescription(self):
+		if not self.descriptionHeap:
+			return
+
+		curTime = gameClock.GetGlobalTimeStamp()
+		if self.descriptionHeap[0][0] > curTime:
+			return
+
 		try:
-			if app.GetGlobalTime() - self.lastUpdateTime > 500:
-			#if 0 < app.GetGlobalTime():
-				self.lastUpdateTime = app.GetGlobalTime()
+			while self.descriptionHeap and self.descriptionHeap[0][0] <= curTime:
+				(deadline, sequence, affect) = heapq.heappop(self.descriptionHeap)
 
-				for image in self.affectImageDict.values():
-					if image.GetAffect() == chr.NEW_AFFECT_AUTO_HP_RECOVERY or image.GetAffect() == chr.NEW_AFFECT_AUTO_SP_RECOVERY:
-						image.UpdateAutoPotionDescription()
-						continue
+				image = self.affectImageDict.get(affect)
+				if not image or image.descriptionSequence != sequence:
+					continue
 
-					if not image.IsSkillAffect():
-						image.UpdateDescription()
+				image.InvalidateDescription()
+				self.__PushDescriptionDeadline(affect, image)
 		except Exception, e:
-			print "AffectShower::OnUpdate error : ", e
+			traceLog.Error("affect", "AffectShower::OnUpdate error : %s", e)
+	# END_OF_DESCRIPTION_DEADLINE
@@ -0,0 +1,290 @@
+##
+## Button Dock
+##
+## A column layout of buttons keyed by a value (quest index, whisper name).
+## Entries are kept as data in the order they were added with a key
+## dictionary for lookups and shown newest first. A removed entry leaves a
+## hole in the order list, the holes are compacted once they are half of it.
+## Only the entries of the current page own a button: a shown entry keeps
+## its button and is only moved when its slot changes, a button is bound
+## only to an entry that did not have one. When there are more entries than
+## slots a pager button steps through the pages.
+##
+import ui
+
+class ButtonDock(object):
+
+	PAGER_HEIGHT = 18
+
+	## createButtonFunc() returns a new button
+	## bindButtonFunc(button, key, data) shows an entry on a slot button
+	## releaseButtonFunc(button) gets back a button that is no longer needed
+	def __init__(self, createButtonFunc, bindButtonFunc, releaseButtonFunc = None):
+		self.createButtonFunc = createButtonFunc
+		self.bindButtonFunc = bindButtonFunc
+		self.releaseButtonFunc = releaseButtonFunc
+
+		# oldest first, None for a removed entry
+		self.keyList = []
+		self.keyIndexDict = {}
+		self.holeCount = 0
+		self.dataDict = {}
+
+		# shown entries
+		self.buttonDict = {}
+		self.slotIndexDict = {}
+		# taken from a removed entry, bound again or released by __Refresh
+		self.freeButtonList = []
+
+		self.x = 0
+		self.y = 0
+		self.columnStep = 0
+		self.rowStep = 0
+		self.rowCount = 1
+		self.columnCount = 1
+
+		self.page = 0
+		self.isShow = True
+
+		self.pagerButton = None
+
+	def Destroy(self):
+		self.Clear()
+
+		if self.pagerButton:
+			self.pagerButton.SetEvent(0)
+			self.pagerButton.Hide()
+			self.pagerButton = None
+
+		self.createButtonFunc = None
+		self.bindButtonFunc = None
+		self.releaseButtonFunc = None
+
+	def SetLayout(self, x, y, columnStep, rowStep, rowCount, columnCount):
+		rowCount = max(1, rowCount)
+		columnCount = max(1, columnCount)
+
+		if (self.x, self.y, self.columnStep, self.rowStep, self.rowCount, self.columnCount) == (x, y, columnStep, rowStep, rowCount, columnCount):
+			return
+
+		self.x = x
+		self.y = y
+		self.columnStep = columnStep
+		self.rowStep = rowStep
+
+		self.rowCount = rowCount
+		self.columnCount = columnCount
+
+		for (key, slotIndex) in self.slotIndexDict.items():
+			self.buttonDict[key].SetPosition(*self.__GetSlotPosition(slotIndex))
+
+		self.__Refresh()
+
+	def GetSlotCount(self):
+		return self.rowCount * self.columnCount
+
+	def GetPageCount(self):
+		slotCount = self.GetSlotCount()
+		return max(1, (len(self.dataDict) + slotCount - 1) / slotCount)
+
+	## Entries
+	def Add(self, key, data):
+		if self.dataDict.has_key(key):
+			self.__RemoveKey(key)
+
+		self.keyIndexDict[key] = len(self.keyList)
+		self.keyList.append(key)
+		self.dataDict[key] = data
+
+		# the new entry is always shown
+		self.page = 0
+		self.__Refresh()
+
+	def Remove(self, key):
+		if not self.dataDict.has_key(key):
+			return False
+
+		self.__RemoveKey(key)
+		del self.dataDict[key]
+
+		self.page = min(self.page, self.GetPageCount() - 1)
+		self.__Refresh()
+		return True
+
+	def Has(self, key):
+		return self.dataDict.has_key(key)
+
+	def GetData(self, key):
+		return self.dataDict.get(key)
+
+	## newest first
+	def GetKeyList(self):
+		return [key for key in reversed(self.keyList) if None != key]
+
+	def GetCount(self):
+		return len(self.dataDict)
+
+	## returns the button of a shown entry or None
+	def GetButton(self, key):
+		return self.buttonDict.get(key)
+
+	def Clear(self):
+		self.keyList = []
+		self.keyIndexDict = {}
+		self.holeCount = 0
+		self.dataDict = {}
+		self.page = 0
+		self.__ReleaseAllSlots()
+		self.__RefreshPager()
+
+	## Show & Hide
+	def Show(self):
+		self.isShow = True
+		for button in self.buttonDict.itervalues():
+			button.Show()
+		self.__RefreshPager()
+
+	def Hide(self):
+		self.isShow = False
+		for button in self.buttonDict.itervalues():
+			button.Hide()
+		if self.pagerButton:
+			self.pagerButton.Hide()
+
+	def IsShow(self):
+		return self.isShow
+
+	## Page
+	def SetPage(self, page):
+		page = max(0, min(page, self.GetPageCount() - 1))
+		if page == self.page:
+			return
+
+		self.page = page
+		self.__Refresh()
+
+	def NextPage(self):
+		if self.GetPageCount() <= 1:
+			return
+
+		self.page = (self.page + 1) % self.GetPageCount()
+		self.__Refresh()
+
+	## Order
+	def __RemoveKey(self, key):
+		self.keyList[self.keyIndexDict.pop(key)] = None
+		self.holeCount += 1
+
+		# shown with the old data, its button is bound again or released
+		if self.buttonDict.has_key(key):
+			self.freeButtonList.append(self.buttonDict.pop(key))
+			del self.slotIndexDict[key]
+
+		if self.holeCount * 2 > len(self.keyList):
+			self.keyList = [key for key in self.keyList if None != key]
+			self.holeCount = 0
+			for index in xrange(len(self.keyList)):
+				self.keyIndexDict[self.keyList[index]] = index
+
+	def __GetPageKeyList(self):
+		slotCount = self.GetSlotCount()
+		skipCount = self.page * slotCount
+
+		pageKeyList = []
+		for index in xrange(len(self.keyList) - 1, -1, -1):
+			key = self.keyList[index]
+			if None == key:
+				continue
+
+			if skipCount > 0:
+				skipCount -= 1
+				continue
+
+			pageKeyList.append(key)
+			if len(pageKeyList) == slotCount:
+				break
+
+		return pageKeyList
+
+	## Layout
+	def __GetSlotPosition(self, slotIndex):
+		return (self.x + (slotIndex / self.rowCount) * self.columnStep, self.y + (slotIndex % self.rowCount) * self.rowStep)
+
+	def __ReleaseButton(self, button):
+		button.Hide()
+		if self.releaseButtonFunc:
+			self.releaseButtonFunc(button)
+
+	def __ReleaseAllSlots(self):
+		for button in self.buttonDict.itervalues():
+			self.__ReleaseButton(button)
+		for button in self.freeButtonList:
+			self.__ReleaseButton(button)
+
+		self.buttonDict = {}
+		self.slotIndexDict = {}
+		self.freeButtonList = []
+
+	def __Refresh(self):
+		pageKeyList = self.__GetPageKeyList()
+
+		# entries that left the page give their buttons to the new ones
+		pageKeyDict = dict.fromkeys(pageKeyList)
+		for key in self.buttonDict.keys():
+			if not pageKeyDict.has_key(key):
+				self.freeButtonList.append(self.buttonDict.pop(key))
+				del self.slotIndexDict[key]
+
+		for slotIndex in xrange(len(pageKeyList)):
+			key = pageKeyList[slotIndex]
+
+			button = self.buttonDict.get(key)
+			if button:
+				if self.slotIndexDict[key] != slotIndex:
+					self.slotIndexDict[key] = slotIndex
+					button.SetPosition(*self.__GetSlotPosition(slotIndex))
+				continue
+
+			if self.freeButtonList:
+				button = self.freeButtonList.pop()
+			else:
+				button = self.createButtonFunc()
+
+			self.buttonDict[key] = button
+			self.slotIndexDict[key] = slotIndex
+			button.SetPosition(*self.__GetSlotPosition(slotIndex))
+			self.bindButtonFunc(button, key, self.dataDict[key])
+
+			if self.isShow:
+				button.Show()
+			else:
+				button.Hide()
+
+		# buttons nobody shows any more
+		freeButtonList = self.freeButtonList
+		self.freeButtonList = []
+		for button in freeButtonList:
+			self.__ReleaseButton(button)
+
+		self.__RefreshPager()
+
+	def __RefreshPager(self):
+		pageCount = self.GetPageCount()
+
+		if pageCount <= 1 or not self.isShow:
+			if self.pagerButton:
+				self.pagerButton.Hide()
+			return
+
+		if not self.pagerButton:
+			pagerButton = ui.Button()
+			pagerButton.SetUpVisual("d:/ymir work/ui/public/small_button_01.sub")
+			pagerButton.SetOverVisual("d:/ymir work/ui/public/small_button_02.sub")
+			pagerButton.SetDownVisual("d:/ymir work/ui/public/small_button_03.sub")
+			pagerButton.SetEvent(ui.__mem_func__(self.NextPage))
+			self.pagerButton = pagerButton
+
+		(x, y) = self.__GetSlotPosition(0)
+		self.pagerButton.SetPosition(x, y - self.PAGER_HEIGHT - 4)
+		self.pagerButton.SetText("%d/%d" % (self.page + 1, pageCount))
+		self.pagerButton.Show()
@@ -1,13 +1,21 @@
 import app
 import ui
 import player
-import net
+import commandQueue
+import playerStatus
+import updateScheduler
+
+# the help button goes with the play time, no point change tells about it
+HELP_BUTTON_CHECK_PERIOD = 10000
 
 class GameButtonWindow(ui.ScriptWindow):
 	def __init__(self):
 		ui.ScriptWindow.__init__(self)
 		self.__LoadWindow("UIScript/gamewindow.py")
 
+		self.statusSubscribeHandle = playerStatus.Subscribe(ui.__mem_func__(self.CheckGameButton), (player.STAT, player.SKILL_ACTIVE))
+		self.helpButtonCheckHandle = updateScheduler.Register(ui.__mem_func__(self.__CheckHelpButton), HELP_BUTTON_CHECK_PERIOD, updateScheduler.PRIORITY_LOW)
+
 	def __del__(self):
 		ui.ScriptWindow.__del__(self)
 
@@ -45,6 +53,14 @@ class GameButtonWindow(ui.ScriptWindow):
 
 	@ui.WindowDestroy
 	def Destroy(self):
+		if self.statusSubscribeHandle:
+			playerStatus.Unsubscribe(self.statusSubscribeHandle)
+			self.statusSubscribeHandle = None
+
+		if self.helpButtonCheckHandle:
+			updateScheduler.Unregister(self.helpButtonCheckHandle)
+			self.helpButtonCheckHandle = None
+
 		if self.gameButtonDict:
 			for key in self.gameButtonDict:
 				self.gameButtonDict[key].SetEvent(0)
@@ -64,6 +80,11 @@ class GameButtonWindow(ui.ScriptWindow):
 	def HideBuildButton(self):
 		self.gameButtonDict["BUILD"].Hide()
 
+	## changes while hidden are checked again here
+	def Show(self):
+		ui.ScriptWindow.Show(self)
+		self.CheckGameButton()
+
 	def CheckGameButton(self):
 
 		if not self.IsShow():
@@ -71,9 +92,8 @@ class GameButtonWindow(ui.ScriptWindow):
 
 		statusPlusButton=self.gameButtonDict["STATUS"]
 		skillPlusButton=self.gameButtonDict["SKILL"]
-		helpButton=self.gameButtonDict["HELP"]
 
-		if player.GetStatus(player.STAT) > 0:
+		if playerStatus.Get(player.STAT) > 0:
 			statusPlusButton.Show()
 		else:
 			statusPlusButton.Hide()
@@ -83,19 +103,27 @@ class GameButtonWindow(ui.ScriptWindow):
 		else:
 			skillPlusButton.Hide()
 
+		self.__CheckHelpButton()
+
+	def __CheckHelpButton(self):
+		if not self.IsShow():
+			return
+
+		helpButton=self.gameButtonDict["HELP"]
+
 		if 0 == player.GetPlayTime():
 			helpButton.Show()
 		else:
 			helpButton.Hide()
 
 	def __IsSkillStat(self):
-		if player.GetStatus(player.SKILL_ACTIVE) > 0:
+		if playerStatus.Get(player.SKILL_ACTIVE) > 0:
 			return True
 
 		return False
 
 	def __OnClickExitObserver(self):
-		net.SendChatPacket("/observer_exit")
+		commandQueue.Send("/observer_exit")
 
 	def __HideAllGameButton(self):
 		for btn in self.gameButtonDict.values():
@@ -1,7 +1,6 @@
 import ui
 import snd
 import systemSetting
-import net
 import chat
 import app
 import localeInfo
@@ -10,6 +9,9 @@ import chrmgr
 import player
 import uiPrivateShopBuilder
 import interfaceModule
+import commandQueue
+import playerStatus
+import traceLog
 
 blockMode = 0
 viewChatMode = 0
@@ -29,7 +31,7 @@ class OptionDialog(ui.ScriptWindow):
 
 	def __del__(self):
 		ui.ScriptWindow.__del__(self)
-		print " -------------------------------------- DELETE GAME OPTION DIALOG"
+		traceLog.Debug("ui", "DELETE GAME OPTION DIALOG")
 
 	def __Initialize(self):
 		self.titleBar = 0
@@ -49,7 +51,7 @@ class OptionDialog(ui.ScriptWindow):
 		self.ClearDictionary()
 
 		self.__Initialize()
-		print " -------------------------------------- DESTROY GAME OPTION DIALOG"
+		traceLog.Debug("ui", "DESTROY GAME OPTION DIALOG")
 
 	def __Load_LoadScript(self, fileName):
 		try:
@@ -198,27 +200,27 @@ class OptionDialog(ui.ScriptWindow):
 	def __OnClickBlockExchangeButton(self):
 		self.RefreshBlock()
 		global blockMode
-		net.SendChatPacket("/setblockmode " + str(blockMode ^ player.BLOCK_EXCHANGE))
+		commandQueue.Send("/setblockmode " + str(blockMode ^ player.BLOCK_EXCHANGE))
 	def __OnClickBlockPartyButton(self):
 		self.RefreshBlock()
 		global blockMode
-		net.SendChatPacket("/setblockmode " + str(blockMode ^ player.BLOCK_PARTY))
+		commandQueue.Send("/setblockmode " + str(blockMode ^ player.BLOCK_PARTY))
 	def __OnClickBlockGuildButton(self):
 		self.RefreshBlock()
 		global blockMode
-		net.SendChatPacket("/setblockmode " + str(blockMode ^ player.BLOCK_GUILD))
+		commandQueue.Send("/setblockmode " + str(blockMode ^ player.BLOCK_GUILD))
 	def __OnClickBlockWhisperButton(self):
 		self.RefreshBlock()
 		global blockMode
-		net.SendChatPacket("/setblockmode " + str(blockMode ^ player.BLOCK_WHISPER))
+		commandQueue.Send("/setblockmode " + str(blockMode ^ player.BLOCK_WHISPER))
 	def __OnClickBlockFriendButton(self):
 		self.RefreshBlock()
 		global blockMode
-		net.SendChatPacket("/setblockmode " + str(blockMode ^ player.BLOCK_FRIEND))
+		commandQueue.Send("/setblockmode " + str(blockMode ^ player.BLOCK_FRIEND))
 	def __OnClickBlockPartyRequest(self):
 		self.RefreshBlock()
 		global blockMode
-		net.SendChatPacket("/setblockmode " + str(blockMode ^ player.BLOCK_PARTY_REQUEST))
+		commandQueue.Send("/setblockmode " + str(blockMode ^ player.BLOCK_PARTY_REQUEST))
 
 	def __OnClickViewChatOnButton(self):
 		global viewChatMode
@@ -265,7 +267,7 @@ class OptionDialog(ui.ScriptWindow):
 			self.RefreshShowMobInfo()
 
 	def __CheckPvPProtectedLevelPlayer(self):
-		if player.GetStatus(player.LEVEL)<constInfo.PVPMODE_PROTECTED_LEVEL:
+		if playerStatus.Get(player.LEVEL)<constInfo.PVPMODE_PROTECTED_LEVEL:
 			self.__SetPeacePKMode()
 			chat.AppendChat(chat.CHAT_TYPE_INFO, localeInfo.OPTION_PVPMODE_PROTECT % (constInfo.PVPMODE_PROTECTED_LEVEL))
 			return 1
@@ -291,7 +293,7 @@ class OptionDialog(ui.ScriptWindow):
 		self.__RefreshPVPButtonList()
 
 		if constInfo.PVPMODE_ENABLE:
-			net.SendChatPacket("/pkmode 0", chat.CHAT_TYPE_TALKING)
+			commandQueue.Send("/pkmode 0", chat.CHAT_TYPE_TALKING)
 		else:
 			chat.AppendChat(chat.CHAT_TYPE_INFO, localeInfo.OPTION_PVPMODE_NOT_SUPPORT)
 
@@ -302,7 +304,7 @@ class OptionDialog(ui.ScriptWindow):
 		self.__RefreshPVPButtonList()
 
 		if constInfo.PVPMODE_ENABLE:
-			net.SendChatPacket("/pkmode 1", chat.CHAT_TYPE_TALKING)
+			commandQueue.Send("/pkmode 1", chat.CHAT_TYPE_TALKING)
 		else:
 			chat.AppendChat(chat.CHAT_TYPE_INFO, localeInfo.OPTION_PVPMODE_NOT_SUPPORT)
 
@@ -313,7 +315,7 @@ class OptionDialog(ui.ScriptWindow):
 		self.__RefreshPVPButtonList()
 
 		if constInfo.PVPMODE_ENABLE:
-			net.SendChatPacket("/pkmode 2", chat.CHAT_TYPE_TALKING)
+			commandQueue.Send("/pkmode 2", chat.CHAT_TYPE_TALKING)
 		else:
 			chat.AppendChat(chat.CHAT_TYPE_INFO, localeInfo.OPTION_PVPMODE_NOT_SUPPORT)
 
@@ -328,7 +330,7 @@ class OptionDialog(ui.ScriptWindow):
 			return
 
 		if constInfo.PVPMODE_ENABLE:
-			net.SendChatPacket("/pkmode 4", chat.CHAT_TYPE_TALKING)
+			commandQueue.Send("/pkmode 4", chat.CHAT_TYPE_TALKING)
 		else:
 			chat.AppendChat(chat.CHAT_TYPE_INFO, localeInfo.OPTION_PVPMODE_NOT_SUPPORT)
 
@@ -2,6 +2,8 @@ import ui
 import player
 import chr
 import textTail
+import updateScheduler
+import playerStatus
 
 class PlayerGauge(ui.Gauge):
 
@@ -16,14 +18,30 @@ class PlayerGauge(ui.Gauge):
 
 		self.showAlways = False
 
+		self.positionUpdateHandle = updateScheduler.Register(ui.__mem_func__(self.__UpdatePosition), 0, updateScheduler.PRIORITY_HIGH)
+		self.statusSubscribeHandle = playerStatus.Subscribe(ui.__mem_func__(self.RefreshGauge), (player.HP, player.MAX_HP))
+
 	def __del__(self):
 		ui.Gauge.__del__(self)
 
+	def Destroy(self):
+		if self.positionUpdateHandle:
+			updateScheduler.Unregister(self.positionUpdateHandle)
+			self.positionUpdateHandle = None
+
+		if self.statusSubscribeHandle:
+			playerStatus.Unsubscribe(self.statusSubscribeHandle)
+			self.statusSubscribeHandle = None
+
 	def Hide(self):
 		self.SetPosition(-100, -100)
 		ui.Gauge.Hide(self)
 
-	def OnUpdate(self):
+	def __UpdatePosition(self):
+		if self.IsShow():
+			self.UpdatePosition()
+
+	def UpdatePosition(self):
 		playerIndex = player.GetMainCharacterIndex()
 
 		(x, y, z)=textTail.GetPosition(playerIndex)
@@ -33,8 +51,8 @@ class PlayerGauge(ui.Gauge):
 
 	def RefreshGauge(self):
 
-		self.curHP = player.GetStatus(player.HP)
-		self.maxHP = player.GetStatus(player.MAX_HP)
+		self.curHP = playerStatus.Get(player.HP)
+		self.maxHP = playerStatus.Get(player.MAX_HP)
 		self.SetPercentage(self.curHP, self.maxHP)
 
 		if self.showAlways:
@@ -48,7 +66,7 @@ class PlayerGauge(ui.Gauge):
 
 			else:
 				if self.curHP < self.maxHP / 2:
-					self.OnUpdate()
+					self.UpdatePosition()
 					self.Show()
 
 	def EnableShowAlways(self):
@@ -0,0 +1,200 @@
+##
+## UI Script Cache
+##
+## ui.PythonScriptLoader.LoadScriptFile runs every window layout script
+## through execfile only to read the "window" dictionary it builds.
+## Install replaces the builtin execfile so layout scripts are run once:
+## the resulting "window" dictionary is kept in memory for the session and
+## marshalled to disk, keyed by script path, screen size and a hash of what
+## else a script reads (the locale strings and the app flags), and reused
+## for as long as the script source hash matches. Every caller gets its own
+## copy of the dictionary. Entries not used for UNUSED_SAVE_COUNT saves are
+## dropped from the disk cache.
+##
+import __builtin__
+import copy
+import marshal
+import hashlib
+import app
+import localeInfo
+import uiScriptLocale
+
+CACHE_FILE_NAME = "uiscript.dat"
+CACHE_VERSION = 2
+UNUSED_SAVE_COUNT = 8
+MAX_DISK_ENTRY_COUNT = 1024
+
+# key -> window dict, scripts already looked at in this session
+memoryDict = {}
+# key -> (sourceHash, window dict, save count of the last use)
+diskDict = {}
+saveCount = 0
+isLoaded = False
+isChanged = False
+
+environmentHash = None
+
+originalExecFile = None
+
+def LoadCache():
+	global diskDict, saveCount, isLoaded, isChanged
+
+	isLoaded = True
+	isChanged = False
+	diskDict = {}
+	saveCount = 0
+
+	try:
+		data = old_open(CACHE_FILE_NAME, "rb").read()
+	except IOError:
+		return
+
+	try:
+		(version, loadedSaveCount, loadedDict) = marshal.loads(data)
+	except (EOFError, ValueError, TypeError):
+		import dbg
+		dbg.TraceError("uiScriptCache.LoadCache - broken cache file %s" % (CACHE_FILE_NAME))
+		return
+
+	if CACHE_VERSION != version:
+		return
+
+	diskDict = loadedDict
+	saveCount = loadedSaveCount
+
+def __DropUnusedEntries():
+	global diskDict
+
+	for (key, (sourceHash, window, lastSaveCount)) in diskDict.items():
+		if saveCount - lastSaveCount > UNUSED_SAVE_COUNT:
+			del diskDict[key]
+
+	if len(diskDict) > MAX_DISK_ENTRY_COUNT:
+		keyList = sorted(diskDict, key = lambda k: diskDict[k][2], reverse = True)
+		diskDict = dict([(key, diskDict[key]) for key in keyList[:MAX_DISK_ENTRY_COUNT]])
+
+def SaveCache():
+	global isChanged, saveCount
+
+	if not isChanged:
+		return
+
+	saveCount += 1
+	__DropUnusedEntries()
+
+	try:
+		old_open(CACHE_FILE_NAME, "wb").write(marshal.dumps((CACHE_VERSION, saveCount, diskDict)))
+	except (IOError, ValueError), msg:
+		import dbg
+		dbg.TraceError("uiScriptCache.SaveCache - %s" % (msg))
+		return
+
+	isChanged = False
+
+def Clear():
+	global environmentHash
+
+	memoryDict.clear()
+	environmentHash = None
+
+def __IsLayoutScript(globals, locals):
+	if None == globals or None != locals:
+		return False
+
+	return globals.has_key("SCREEN_WIDTH") and globals.has_key("SCREEN_HEIGHT")
+
+## hash of the locale strings and the app flags, the values layout scripts read
+def __GetEnvironmentHash():
+	global environmentHash
+
+	if None != environmentHash:
+		return environmentHash
+
+	md5 = hashlib.md5()
+	for module in (uiScriptLocale, localeInfo):
+		for name in sorted(module.__dict__):
+			value = module.__dict__[name]
+			if isinstance(value, (str, int, long, float)):
+				md5.update("%s=%r\n" % (name, value))
+
+	for name in sorted(dir(app)):
+		if name.isupper():
+			value = getattr(app, name)
+			if isinstance(value, (int, long)):
+				md5.update("app.%s=%d\n" % (name, value))
+
+	environmentHash = md5.hexdigest()
+	return environmentHash
+
+def __MakeKey(fileName, globals):
+	return "%s|%s|%d|%d" % (fileName.replace("\\", "/").lower(), __GetEnvironmentHash(), globals["SCREEN_WIDTH"], globals["SCREEN_HEIGHT"])
+
+def __ExecFile(fileName, globals = None, locals = None):
+	global isChanged
+
+	if not __IsLayoutScript(globals, locals):
+		if None == globals:
+			return originalExecFile(fileName)
+		elif None == locals:
+			return originalExecFile(fileName, globals)
+		else:
+			return originalExecFile(fileName, globals, locals)
+
+	key = __MakeKey(fileName, globals)
+
+	window = memoryDict.get(key)
+	if None != window:
+		globals["window"] = copy.deepcopy(window)
+		return
+
+	if not isLoaded:
+		LoadCache()
+
+	sourceHash = hashlib.md5(open(fileName, "rb").read()).hexdigest()
+
+	cached = diskDict.get(key)
+	if cached and cached[0] == sourceHash:
+		window = cached[1]
+		globals["window"] = copy.deepcopy(window)
+
+		if cached[2] != saveCount:
+			diskDict[key] = (sourceHash, window, saveCount)
+			isChanged = True
+	else:
+		originalExecFile(fileName, globals)
+
+		window = globals.get("window")
+		if None == window:
+			return
+
+		# kept apart from the dictionary the caller gets
+		window = copy.deepcopy(window)
+
+		try:
+			marshal.dumps(window)
+		except ValueError:
+			# scripts holding functions or objects are only kept in memory
+			pass
+		else:
+			diskDict[key] = (sourceHash, window, saveCount)
+			isChanged = True
+
+	memoryDict[key] = window
+
+def Install():
+	global originalExecFile
+
+	if originalExecFile:
+		return
+
+	originalExecFile = __builtin__.execfile
+	__builtin__.execfile = __ExecFile
+
+def Uninstall():
+	global originalExecFile
+
+	if not originalExecFile:
+		return
+
+	__builtin__.execfile = originalExecFile
+	originalExecFile = None
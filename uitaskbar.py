@@ -1,5 +1,4 @@
 import ui
-import net
 import item
 import skill
 import localeInfo
@@ -8,7 +7,11 @@ import player
 import constInfo
 import mouseModule
 import uiScriptLocale
-import app
+import gameClock
+import commandQueue
+import updateScheduler
+import playerStatus
+import imageCache
 
 MOUSE_SETTINGS = [0, 0]
 
@@ -120,6 +123,8 @@ class EnergyBar(ui.ScriptWindow):
 		ui.ScriptWindow.__init__(self)
 		self.tooltipEnergy = self.TextToolTip()
 		self.tooltipEnergy.Show()
+		self.statusUpdateHandle = None
+		self.statusSubscribeHandle = None
 
 	def __del__(self):
 		#print "---------------------------------------------------------------------------- DELETE TASKBAR"
@@ -140,8 +145,19 @@ class EnergyBar(ui.ScriptWindow):
 		self.energyGaugeBoard = self.GetChild("EnergyGauge_Board")
 		self.energyGaugeToolTip = self.GetChild("EnergyGauge_ToolTip")
 
+		self.statusUpdateHandle = updateScheduler.Register(ui.__mem_func__(self.__UpdateStatus), 250, updateScheduler.PRIORITY_LOW)
+		self.statusSubscribeHandle = playerStatus.Subscribe(ui.__mem_func__(self.RefreshStatus), (player.ENERGY, player.ENERGY_END_TIME))
+
 	@ui.WindowDestroy
 	def Destroy(self):
+		if self.statusUpdateHandle:
+			updateScheduler.Unregister(self.statusUpdateHandle)
+			self.statusUpdateHandle = None
+
+		if self.statusSubscribeHandle:
+			playerStatus.Unsubscribe(self.statusSubscribeHandle)
+			self.statusSubscribeHandle = None
+
 		self.energyEmpty = None
 		self.energyHungry = None
 		self.energyFull = None
@@ -151,8 +167,8 @@ class EnergyBar(ui.ScriptWindow):
 
 	## Gauge
 	def RefreshStatus(self):
-		pointEnergy = player.GetStatus (player.ENERGY)
-		leftTimeEnergy = player.GetStatus (player.ENERGY_END_TIME) - app.GetGlobalTimeStamp()
+		pointEnergy = playerStatus.Get (player.ENERGY)
+		leftTimeEnergy = playerStatus.Get (player.ENERGY_END_TIME) - gameClock.GetGlobalTimeStamp()
 		self.SetEnergy (pointEnergy, leftTimeEnergy, 7200)
 
 	def SetEnergy (self, point, leftTime, maxTime):
@@ -172,9 +188,12 @@ class EnergyBar(ui.ScriptWindow):
 
 		self.tooltipEnergy.SetText("%s" % (localeInfo.TOOLTIP_ENERGY(point)))
 
+	def __UpdateStatus(self):
+		if self.IsShow() and True == self.energyGaugeToolTip.IsIn():
+			self.RefreshStatus()
+
 	def OnUpdate(self):
 		if True == self.energyGaugeToolTip.IsIn():
-			self.RefreshStatus()
 			self.tooltipEnergy.Show()
 		else:
 			self.tooltipEnergy.Hide()
@@ -251,6 +270,9 @@ class TaskBar(ui.ScriptWindow):
 		"d:/ymir work/ui/game/taskbar/4.sub",
 	]
 
+	QUICK_SLOT_SLOT_COUNT = 4
+	QUICK_SLOT_WINDOW_COUNT = 2
+
 	#gift icon show and hide
 	def ShowGift(self):
 		self.wndGiftBox.Show()
@@ -398,8 +420,10 @@ class TaskBar(ui.ScriptWindow):
 		}
 
 		self.selectSkillButtonList = []
+		self.statusSubscribeHandleList = []
 
-		self.lastUpdateQuickSlot = 0
+		self.quickslot = 0
+		self.__ClearQuickSlotState()
 		self.SetWindowName("TaskBar")
 
 	def __del__(self):
@@ -539,6 +563,13 @@ class TaskBar(ui.ScriptWindow):
 		self.RefreshStatus()
 		self.RefreshQuickSlot()
 
+		self.statusSubscribeHandleList = [
+			playerStatus.Subscribe(ui.__mem_func__(self.__RefreshHP), (player.HP, player.MAX_HP, player.HP_RECOVERY)),
+			playerStatus.Subscribe(ui.__mem_func__(self.__RefreshSP), (player.SP, player.MAX_SP, player.SP_RECOVERY)),
+			playerStatus.Subscribe(ui.__mem_func__(self.__RefreshExperience), (player.EXP, player.NEXT_EXP)),
+			playerStatus.Subscribe(ui.__mem_func__(self.RefreshStamina), (player.STAMINA, player.MAX_STAMINA)),
+		]
+
 	def __RampageGauge_OverIn(self):
 		print "rampage_over_in"
 		self.rampageGauge2.Show()
@@ -551,7 +582,7 @@ class TaskBar(ui.ScriptWindow):
 
 	def __RampageGauge_Click(self):
 		print "rampage_up"
-		net.SendChatPacket("/in_game_mall")
+		commandQueue.Send("/in_game_mall")
 		# gift icon hide when click mall icon
 		self.wndGiftBox.Hide()
 
@@ -584,6 +615,12 @@ class TaskBar(ui.ScriptWindow):
 	def Destroy(self):
 		SaveMouseButtonSettings()
 
+		self.__ClearQuickSlotState()
+
+		for handle in self.statusSubscribeHandleList:
+			playerStatus.Unsubscribe(handle)
+		self.statusSubscribeHandleList = []
+
 		self.ClearDictionary()
 		if self.mouseModeButtonList:
 			self.mouseModeButtonList[0].ClearDictionary()
@@ -620,9 +657,11 @@ class TaskBar(ui.ScriptWindow):
 
 	def __OnClickQuickPageUpButton(self):
 		player.SetQuickPage(player.GetQuickPage()-1)
+		self.RefreshQuickPage()
 
 	def __OnClickQuickPageDownButton(self):
 		player.SetQuickPage(player.GetQuickPage()+1)
+		self.RefreshQuickPage()
 
 	def SetToggleButtonEvent(self, eButton, kEventFunc):
 		self.toggleButtonDict[eButton].SetEvent(kEventFunc)
@@ -645,24 +684,24 @@ class TaskBar(ui.ScriptWindow):
 
 	## Gauge
 	def RefreshStatus(self):
-		curHP = player.GetStatus(player.HP)
-		maxHP = player.GetStatus(player.MAX_HP)
-		curSP = player.GetStatus(player.SP)
-		maxSP = player.GetStatus(player.MAX_SP)
-		curEXP = unsigned32(player.GetStatus(player.EXP))
-		nextEXP = unsigned32(player.GetStatus(player.NEXT_EXP))
-		recoveryHP = player.GetStatus(player.HP_RECOVERY)
-		recoverySP = player.GetStatus(player.SP_RECOVERY)
-
 		self.RefreshStamina()
 
-		self.SetHP(curHP, recoveryHP, maxHP)
-		self.SetSP(curSP, recoverySP, maxSP)
-		self.SetExperience(curEXP, nextEXP)
+		self.__RefreshHP()
+		self.__RefreshSP()
+		self.__RefreshExperience()
+
+	def __RefreshHP(self):
+		self.SetHP(playerStatus.Get(player.HP), playerStatus.Get(player.HP_RECOVERY), playerStatus.Get(player.MAX_HP))
+
+	def __RefreshSP(self):
+		self.SetSP(playerStatus.Get(player.SP), playerStatus.Get(player.SP_RECOVERY), playerStatus.Get(player.MAX_SP))
+
+	def __RefreshExperience(self):
+		self.SetExperience(unsigned32(playerStatus.Get(player.EXP)), unsigned32(playerStatus.Get(player.NEXT_EXP)))
 
 	def RefreshStamina(self):
-		curST = player.GetStatus(player.STAMINA)
-		maxST = player.GetStatus(player.MAX_STAMINA)
+		curST = playerStatus.Get(player.STAMINA)
+		maxST = playerStatus.Get(player.MAX_STAMINA)
 		self.SetST(curST, maxST)
 
 	def RefreshSkill(self):
@@ -734,82 +773,191 @@ class TaskBar(ui.ScriptWindow):
 
 
 	## QuickSlot
+	##
+	## Slots are refreshed only when something they show has changed:
+	## the game marks them dirty by slot type (inventory, skill) or all
+	## at once, a quick page switch or an ended cool time marks them too,
+	## and OnUpdate refreshes the dirty slots once per frame. OnUpdate does
+	## not run while the TaskBar is hidden, Show refreshes what was missed.
+	def __ClearQuickSlotState(self):
+		slotCount = self.QUICK_SLOT_SLOT_COUNT * self.QUICK_SLOT_WINDOW_COUNT
+
+		self.quickPageIndex = -1
+		self.isQuickPageDirty = True
+		self.quickSlotDirtySet = set()
+		# local slot -> (Type, Position) at the last refresh
+		self.quickSlotBindingList = [ (player.SLOT_TYPE_NONE, 0) ] * slotCount
+		# skill slot -> [local slot, ...], a skill can be bound to several quick slots
+		self.quickSlotSkillIndexDict = {}
+		# local slots bound to something else since their last refresh
+		self.quickSlotRebindSet = set()
+		# local slot -> gameClock.GetTime() the skill cool time ends at
+		self.quickSlotCoolTimeEndDict = {}
+		self.quickSlotNextCoolTimeEnd = 0.0
+
 	def RefreshQuickSlot(self):
+		self.quickSlotDirtySet.update(xrange(len(self.quickSlotBindingList)))
+
+	## call it after player.SetQuickPage
+	def RefreshQuickPage(self):
+		self.isQuickPageDirty = True
+
+	## slotType : player.SLOT_TYPE_INVENTORY, player.SLOT_TYPE_SKILL, ...
+	## Adding, moving and deleting quick slots is confirmed by the server
+	## through RefreshInventory, the binding check here keeps the skill
+	## index up to date with it.
+	def RefreshQuickSlotType(self, slotType):
+		for slotNumber in xrange(len(self.quickSlotBindingList)):
+			binding = player.GetLocalQuickSlot(slotNumber)
+
+			# bound, moved or deleted since the last refresh
+			if binding != self.quickSlotBindingList[slotNumber]:
+				self.__SetQuickSlotBinding(slotNumber, binding)
+			elif slotType == binding[0]:
+				self.quickSlotDirtySet.add(slotNumber)
+
+	def __SetQuickSlotBinding(self, slotNumber, binding):
+		(oldType, oldPosition) = self.quickSlotBindingList[slotNumber]
+		if player.SLOT_TYPE_SKILL == oldType:
+			slotList = self.quickSlotSkillIndexDict.get(oldPosition)
+			if slotList and slotNumber in slotList:
+				slotList.remove(slotNumber)
+				if not slotList:
+					del self.quickSlotSkillIndexDict[oldPosition]
+
+		(Type, Position) = binding
+		if player.SLOT_TYPE_SKILL == Type:
+			self.quickSlotSkillIndexDict.setdefault(Position, []).append(slotNumber)
+
+		self.quickSlotBindingList[slotNumber] = binding
+		self.quickSlotRebindSet.add(slotNumber)
+		self.quickSlotDirtySet.add(slotNumber)
+
+	def __UpdateQuickSlot(self):
+		if not self.quickslot:
+			return
 
-		pageNum = player.GetQuickPage()
+		if self.isQuickPageDirty:
+			self.isQuickPageDirty = False
 
-		try:
-			self.quickPageNumImageBox.LoadImage(TaskBar.QUICKPAGE_NUMBER_FILENAME[pageNum])
-		except:
-			pass
+			pageIndex = player.GetQuickPage()
+			if pageIndex != self.quickPageIndex:
+				self.quickPageIndex = pageIndex
 
-		startNumber = 0
-		for slot in self.quickslot:
+				if 0 <= pageIndex < len(TaskBar.QUICKPAGE_NUMBER_FILENAME):
+					imageCache.LoadImage(self.quickPageNumImageBox, TaskBar.QUICKPAGE_NUMBER_FILENAME[pageIndex])
 
-			for i in xrange(4):
+				self.RefreshQuickSlot()
 
-				slotNumber = i+startNumber
+		if self.quickSlotCoolTimeEndDict and gameClock.GetTime() >= self.quickSlotNextCoolTimeEnd:
+			curTime = gameClock.GetTime()
+			for (slotNumber, coolTimeEnd) in self.quickSlotCoolTimeEndDict.items():
+				if curTime >= coolTimeEnd:
+					self.quickSlotDirtySet.add(slotNumber)
+					del self.quickSlotCoolTimeEndDict[slotNumber]
 
-				(Type, Position) = player.GetLocalQuickSlot(slotNumber)
+			self.__RefreshNextCoolTimeEnd()
 
-				if player.SLOT_TYPE_NONE == Type:
-					slot.ClearSlot(slotNumber)
-					continue
+		if self.quickSlotDirtySet:
+			self.__FlushQuickSlot()
 
-				if player.SLOT_TYPE_INVENTORY == Type:
+	def __SetQuickSlotCoolTimeEnd(self, slotNumber, coolTimeEnd):
+		if coolTimeEnd:
+			self.quickSlotCoolTimeEndDict[slotNumber] = coolTimeEnd
+		elif self.quickSlotCoolTimeEndDict.has_key(slotNumber):
+			del self.quickSlotCoolTimeEndDict[slotNumber]
+		else:
+			return
 
-					itemIndex = player.GetItemIndex(Position)
-					itemCount = player.GetItemCount(Position)
-					if itemCount <= 1:
-						itemCount = 0
+		self.__RefreshNextCoolTimeEnd()
 
-					if constInfo.IS_AUTO_POTION(itemIndex):
-						metinSocket = [player.GetItemMetinSocket(Position, j) for j in xrange(player.METIN_SOCKET_MAX_NUM)]
+	def __RefreshNextCoolTimeEnd(self):
+		if self.quickSlotCoolTimeEndDict:
+			self.quickSlotNextCoolTimeEnd = min(self.quickSlotCoolTimeEndDict.itervalues())
+		else:
+			self.quickSlotNextCoolTimeEnd = 0.0
 
-						if 0 != int(metinSocket[0]):
-							slot.ActivateSlot(slotNumber)
-						else:
-							slot.DeactivateSlot(slotNumber)
+	def __FlushQuickSlot(self):
+		dirtyList = sorted(self.quickSlotDirtySet)
+		self.quickSlotDirtySet = set()
 
-					slot.SetItemSlot(slotNumber, itemIndex, itemCount)
+		refreshWindowSet = set()
+		for slotNumber in dirtyList:
+			slotWindow = self.quickslot[slotNumber / self.QUICK_SLOT_SLOT_COUNT]
+			self.__RefreshQuickSlotSlot(slotWindow, slotNumber)
+			refreshWindowSet.add(slotNumber / self.QUICK_SLOT_SLOT_COUNT)
 
-				elif player.SLOT_TYPE_SKILL == Type:
+		for windowIndex in refreshWindowSet:
+			self.quickslot[windowIndex].RefreshSlot()
 
-					skillIndex = player.GetSkillIndex(Position)
-					if 0 == skillIndex:
-						slot.ClearSlot(slotNumber)
-						continue
+	def __RefreshQuickSlotSlot(self, slot, slotNumber):
+		(Type, Position) = player.GetLocalQuickSlot(slotNumber)
 
-					skillType = skill.GetSkillType(skillIndex)
-					if skill.SKILL_TYPE_GUILD == skillType:
-						import guild
-						skillGrade = 0
-						skillLevel = guild.GetSkillLevel(Position)
+		if (Type, Position) != self.quickSlotBindingList[slotNumber]:
+			self.__SetQuickSlotBinding(slotNumber, (Type, Position))
 
-					else:
-						skillGrade = player.GetSkillGrade(Position)
-						skillLevel = player.GetSkillLevel(Position)
+		if slotNumber in self.quickSlotRebindSet:
+			self.quickSlotRebindSet.remove(slotNumber)
+			slot.ClearSlot(slotNumber)
 
-					slot.SetSkillSlotNew(slotNumber, skillIndex, skillGrade, skillLevel)
-					slot.SetSlotCountNew(slotNumber, skillGrade, skillLevel)
-					slot.SetCoverButton(slotNumber)
+		self.__SetQuickSlotCoolTimeEnd(slotNumber, 0.0)
 
-					if player.IsSkillCoolTime(Position):
-						(coolTime, elapsedTime) = player.GetSkillCoolTime(Position)
-						slot.SetSlotCoolTime(slotNumber, coolTime, elapsedTime)
+		if player.SLOT_TYPE_NONE == Type:
+			slot.ClearSlot(slotNumber)
+			return
 
-					if player.IsSkillActive(Position):
-						slot.ActivateSlot(slotNumber)
+		if player.SLOT_TYPE_INVENTORY == Type:
 
-				elif player.SLOT_TYPE_EMOTION == Type:
+			itemIndex = player.GetItemIndex(Position)
+			itemCount = player.GetItemCount(Position)
+			if itemCount <= 1:
+				itemCount = 0
 
-					emotionIndex = Position
-					slot.SetEmotionSlot(slotNumber, emotionIndex)
-					slot.SetCoverButton(slotNumber)
-					slot.SetSlotCount(slotNumber, 0)
+			if constInfo.IS_AUTO_POTION(itemIndex):
+				metinSocket = [player.GetItemMetinSocket(Position, j) for j in xrange(player.METIN_SOCKET_MAX_NUM)]
 
-			slot.RefreshSlot()
-			startNumber += 4
+				if 0 != int(metinSocket[0]):
+					slot.ActivateSlot(slotNumber)
+				else:
+					slot.DeactivateSlot(slotNumber)
+
+			slot.SetItemSlot(slotNumber, itemIndex, itemCount)
+
+		elif player.SLOT_TYPE_SKILL == Type:
+
+			skillIndex = player.GetSkillIndex(Position)
+			if 0 == skillIndex:
+				slot.ClearSlot(slotNumber)
+				return
+
+			skillType = skill.GetSkillType(skillIndex)
+			if skill.SKILL_TYPE_GUILD == skillType:
+				import guild
+				skillGrade = 0
+				skillLevel = guild.GetSkillLevel(Position)
+
+			else:
+				skillGrade = player.GetSkillGrade(Position)
+				skillLevel = player.GetSkillLevel(Position)
+
+			slot.SetSkillSlotNew(slotNumber, skillIndex, skillGrade, skillLevel)
+			slot.SetSlotCountNew(slotNumber, skillGrade, skillLevel)
+			slot.SetCoverButton(slotNumber)
+
+			if player.IsSkillCoolTime(Position):
+				(coolTime, elapsedTime) = player.GetSkillCoolTime(Position)
+				slot.SetSlotCoolTime(slotNumber, coolTime, elapsedTime)
+				self.__SetQuickSlotCoolTimeEnd(slotNumber, gameClock.GetTime() + max(0.0, coolTime - elapsedTime))
+
+			if player.IsSkillActive(Position):
+				slot.ActivateSlot(slotNumber)
+
+		elif player.SLOT_TYPE_EMOTION == Type:
+
+			emotionIndex = Position
+			slot.SetEmotionSlot(slotNumber, emotionIndex)
+			slot.SetCoverButton(slotNumber)
+			slot.SetSlotCount(slotNumber, 0)
 
 	def canAddQuickSlot(self, Type, slotNumber):
 
@@ -866,69 +1014,32 @@ class TaskBar(ui.ScriptWindow):
 
 
 	def OnUseSkill(self, usedSlotIndex, coolTime):
-
-		QUICK_SLOT_SLOT_COUNT = 4
-		slotIndex = 0
-
 		## Current Skill Button
 		if usedSlotIndex == self.curSkillButton.GetSlotIndex():
 			self.curSkillButton.Activate(coolTime)
 
 		## Quick Slot
-		for slotWindow in self.quickslot:
-
-			for i in xrange(QUICK_SLOT_SLOT_COUNT):
-
-				(Type, Position) = player.GetLocalQuickSlot(slotIndex)
-
-				if Type == player.SLOT_TYPE_SKILL:
-					if usedSlotIndex == Position:
-						slotWindow.SetSlotCoolTime(slotIndex, coolTime)
-						return
-
-				slotIndex += 1
+		for slotNumber in self.quickSlotSkillIndexDict.get(usedSlotIndex, ()):
+			self.quickslot[slotNumber / self.QUICK_SLOT_SLOT_COUNT].SetSlotCoolTime(slotNumber, coolTime)
+			self.__SetQuickSlotCoolTimeEnd(slotNumber, gameClock.GetTime() + coolTime)
 
 	def OnActivateSkill(self, usedSlotIndex):
-		slotIndex = 0
-
 		## Current Skill Button
 		if usedSlotIndex == self.curSkillButton.GetSlotIndex():
 			self.curSkillButton.Deactivate()
 
 		## Quick Slot
-		for slotWindow in self.quickslot:
-
-			for i in xrange(4):
-
-				(Type, Position) = player.GetLocalQuickSlot(slotIndex)
-
-				if Type == player.SLOT_TYPE_SKILL:
-					if usedSlotIndex == Position:
-						slotWindow.ActivateSlot(slotIndex)
-						return
-
-				slotIndex += 1
+		for slotNumber in self.quickSlotSkillIndexDict.get(usedSlotIndex, ()):
+			self.quickslot[slotNumber / self.QUICK_SLOT_SLOT_COUNT].ActivateSlot(slotNumber)
 
 	def OnDeactivateSkill(self, usedSlotIndex):
-		slotIndex = 0
-
 		## Current Skill Button
 		if usedSlotIndex == self.curSkillButton.GetSlotIndex():
 			self.curSkillButton.Deactivate()
 
 		## Quick Slot
-		for slotWindow in self.quickslot:
-
-			for i in xrange(4):
-
-				(Type, Position) = player.GetLocalQuickSlot(slotIndex)
-
-				if Type == player.SLOT_TYPE_SKILL:
-					if usedSlotIndex == Position:
-						slotWindow.DeactivateSlot(slotIndex)
-						return
-
-				slotIndex += 1
+		for slotNumber in self.quickSlotSkillIndexDict.get(usedSlotIndex, ()):
+			self.quickslot[slotNumber / self.QUICK_SLOT_SLOT_COUNT].DeactivateSlot(slotNumber)
 
 	## ToolTip
 	def OverInItem(self, slotNumber):
@@ -964,10 +1075,14 @@ class TaskBar(ui.ScriptWindow):
 		if 0 != self.tooltipSkill:
 			self.tooltipSkill.HideToolTip()
 
+	def Show(self):
+		ui.ScriptWindow.Show(self)
+
+		# slots marked dirty while hidden
+		self.__UpdateQuickSlot()
+
 	def OnUpdate(self):
-		if app.GetGlobalTime() - self.lastUpdateQuickSlot > 500:
-			self.lastUpdateQuickSlot = app.GetGlobalTime()
-			self.RefreshQuickSlot()
+		self.__UpdateQuickSlot()
 
 		if True == self.hpGaugeBoard.IsIn():
 			self.tooltipHP.Show()
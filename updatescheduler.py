@@ -0,0 +1,73 @@
+##
+## Update Scheduler
+##
+## Periodic window refreshes register here instead of polling their own
+## timers in OnUpdate. GameWindow.OnUpdate calls Update once per frame and
+## due tasks are run in priority order until the frame budget is used up.
+## High priority tasks always run, the others are pushed to the next
+## frames under load and never run more than once per period.
+##
+import gameClock
+import time
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+FRAME_BUDGET_MS = 2.0
+
+# handle -> [nextTime, priority, period, func]
+taskDict = {}
+lastHandle = 0
+
+def Register(func, period, priority = PRIORITY_NORMAL):
+	global lastHandle
+
+	lastHandle += 1
+
+	# spread tasks with the same period over different frames
+	firstDelay = 0
+	if period > 0:
+		firstDelay = (lastHandle * 17) % period
+
+	taskDict[lastHandle] = [gameClock.GetGlobalTime() + firstDelay, priority, period, func]
+	return lastHandle
+
+def Unregister(handle):
+	if taskDict.has_key(handle):
+		del taskDict[handle]
+
+def Clear():
+	taskDict.clear()
+
+def __RunTask(handle, task):
+	try:
+		task[3]()
+	except ReferenceError:
+		Unregister(handle)
+
+def Update():
+	if not taskDict:
+		return
+
+	curTime = gameClock.GetGlobalTime()
+
+	dueList = [(task[1], task[0], handle) for handle, task in taskDict.items() if task[0] <= curTime]
+	if not dueList:
+		return
+
+	dueList.sort()
+
+	endClock = time.clock() + FRAME_BUDGET_MS / 1000.0
+
+	for (priority, nextTime, handle) in dueList:
+		if PRIORITY_HIGH != priority and time.clock() > endClock:
+			break
+
+		task = taskDict.get(handle)
+		if not task:
+			continue
+
+		# late tasks are not caught up, they just run once and wait a full period
+		task[0] = curTime + task[2]
+		__RunTask(handle, task)